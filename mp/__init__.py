@@ -1,11 +1,21 @@
 version = '1.3.0'
 
 FORCE_UPDATE = 'FORCE_UPDATE'  # env var, also include query string with `update` in it.
+HARD_UPDATE = 'hard'  # value of FORCE_UPDATE or `update` to re-process unchanged images
 VERBOSE_LOGGING = 'VERBOSE_LOGGING'
 TRIGGER_ERROR = 'TRIGGER_ERROR'
 MONITORING_DSN = 'SENTRY_DSN'
 OPERATING_ENV = 'OPERATING_ENV'
 DATABASE_URL = 'DB_URL'
+DATABASE_POOL_SIZE = 'DB_POOL_SIZE'
+DATABASE_POOL_IDLE_TIMEOUT = 'DB_POOL_IDLE_TIMEOUT'  # seconds
 SOURCE_BUCKET = 'AWS_UPLOAD_BUCKET_NAME'
+S3_MAX_POOL_CONNECTIONS = 'S3_MAX_POOL_CONNECTIONS'
+S3_MAX_ATTEMPTS = 'S3_MAX_ATTEMPTS'
+HEADER_FETCH_SIZE = (
+    'HEADER_FETCH_SIZE'  # bytes of an image fetched with the first ranged GET
+)
+
+WORKER_COUNT = 'WORKER_COUNT'  # records of an S3 event processed concurrently
 
 DEFAULT_REGION = 'us-east-1'
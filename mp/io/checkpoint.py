@@ -0,0 +1,112 @@
+from logging import debug, info, warning
+from os import stat, truncate
+from sqlite3 import connect
+
+create_table = (
+    'create table if not exists completed '
+    '(path text primary key, size integer not null, mtime_ns integer not null)'
+)
+select_completed = 'select size, mtime_ns from completed where path = ?'
+insert_completed = (
+    'insert or replace into completed (path, size, mtime_ns) values (?, ?, ?)'
+)
+create_output_table = (
+    'create table if not exists output (path text primary key, size integer not null)'
+)
+select_output = 'select size from output where path = ?'
+insert_output = 'insert or replace into output (path, size) values (?, ?)'
+
+
+class Checkpoint:
+    '''
+    A manifest of the image files whose metadata has been written, kept in a
+    SQLite database so that an interrupted run can resume where it stopped.
+    A file is recorded with its size & modification time, and is skipped
+    only while both are unchanged.
+
+    Files are recorded as they are written, but only made durable by
+    `commit()`, which is to be called after the writer has committed.
+
+    When the metadata is appended to the file `output`, its size is recorded
+    on each commit too, and rows written to it after the last commit of an
+    interrupted run are truncated away, as their files will be written again.
+    '''
+
+    def __init__(self, path, output=None):
+        self.path = path
+        self.output = output
+        self.connection = connect(path)
+        self.connection.execute('pragma journal_mode = wal')
+        self.connection.execute('pragma synchronous = normal')
+        self.connection.execute(create_table)
+        self.connection.execute(create_output_table)
+        if output:
+            self.restore_output()
+        self.connection.commit()
+        # files handed on by skip_completed, by the file path of their key
+        self.pending = {}
+        self.skipped = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def is_completed(self, filename, st):
+        row = self.connection.execute(select_completed, [filename]).fetchone()
+        return row is not None and row == (st.st_size, st.st_mtime_ns)
+
+    def skip_completed(self, images):
+        '''Yields the `(image_key, filename)` pairs of `images` not yet completed.'''
+        for image_key, filename in images:
+            try:
+                st = stat(filename)
+            except (OSError, TypeError):
+                debug(f'not checkpointing {filename}, unable to stat it')
+                yield image_key, filename
+                continue
+            if self.is_completed(filename, st):
+                debug(f'skipping {filename}, already completed')
+                self.skipped = self.skipped + 1
+                continue
+            self.pending[image_key.file_path] = (filename, st.st_size, st.st_mtime_ns)
+            yield image_key, filename
+
+    def written(self, file_path):
+        '''Records the file read for the key `file_path` as written.'''
+        entry = self.pending.pop(file_path, None)
+        if entry:
+            self.connection.execute(insert_completed, entry)
+
+    def output_size(self):
+        try:
+            return stat(self.output).st_size
+        except FileNotFoundError:
+            return 0
+
+    def restore_output(self):
+        '''Truncates `output` to its size when the checkpoint was last committed.'''
+        row = self.connection.execute(select_output, [self.output]).fetchone()
+        size = self.output_size()
+        if row is None:
+            # a new checkpoint, keep anything written before it
+            self.connection.execute(insert_output, [self.output, size])
+        elif size > row[0]:
+            warning(
+                f'truncating {self.output} from {size} to {row[0]} bytes, '
+                'dropping rows not committed by an earlier run.'
+            )
+            truncate(self.output, row[0])
+
+    def commit(self):
+        debug('committing checkpoint.')
+        if self.output:
+            self.connection.execute(insert_output, [self.output, self.output_size()])
+        self.connection.commit()
+
+    def close(self):
+        if self.skipped:
+            info(f'skipped {self.skipped} file(s) completed by an earlier run.')
+        # anything not committed was not yet committed by the writer either
+        self.connection.close()
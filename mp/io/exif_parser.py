@@ -0,0 +1,168 @@
+from logging import debug
+from struct import unpack_from, error as StructError
+
+from mp.io.metadata_tags import (
+    GPS_TAG_IDS,
+    TAG_GPSINFO,
+    TAG_IDS,
+    TAG_EXIF_IFD_POINTER,
+    TAG_GPS_IFD_POINTER,
+)
+
+EXIF_HEADER = b'Exif\x00\x00'
+
+ASCII = 2
+BYTE = 1
+UNDEFINED = 7
+RATIONAL = 5
+SRATIONAL = 10
+
+# TIFF field type -> (struct format of one value, size of one value in bytes)
+FIELD_TYPES = {
+    1: ('B', 1),
+    2: ('s', 1),
+    3: ('H', 2),
+    4: ('L', 4),
+    5: ('LL', 8),
+    6: ('b', 1),
+    7: ('s', 1),
+    8: ('h', 2),
+    9: ('l', 4),
+    10: ('ll', 8),
+    11: ('f', 4),
+    12: ('d', 8),
+}
+
+# Numbers of the tags decoded from IFD0, and from the IFDs its pointer tags
+# lead to; any others, such as maker notes, are skipped without decoding.
+IFD0_TAGS = frozenset(TAG_IDS) | {TAG_EXIF_IFD_POINTER, TAG_GPS_IFD_POINTER}
+IFD_TAGS = {
+    TAG_EXIF_IFD_POINTER: frozenset(TAG_IDS),
+    TAG_GPS_IFD_POINTER: frozenset(GPS_TAG_IDS),
+}
+
+
+class Rational(float):
+    '''
+    A TIFF rational that keeps its numerator & denominator as stored in the
+    file, so that it can stand in for Pillow's `IFDRational`.
+    '''
+
+    __slots__ = ('numerator', 'denominator')
+
+    def __new__(cls, numerator, denominator):
+        value = numerator / denominator if denominator else float('nan')
+        r = float.__new__(cls, value)
+        r.numerator = numerator
+        r.denominator = denominator
+        return r
+
+    def __repr__(self):
+        return f'{self.numerator}/{self.denominator}'
+
+
+def parse_exif(data):
+    '''
+    Decodes a TIFF structured EXIF block into a dict keyed by tag name, with
+    the GPS tags nested under `GPSInfo` and keyed by number; the same shape
+    as produced by Pillow's `_getexif()`.  Only tags named in `TAG_IDS`, and
+    the GPS tags of `GPS_TAG_IDS`, are decoded.
+    '''
+    if not data:
+        return {}
+    if data[:6] == EXIF_HEADER:
+        data = data[6:]
+
+    byte_order = data[:2]
+    if byte_order == b'II':
+        endian = '<'
+    elif byte_order == b'MM':
+        endian = '>'
+    else:
+        debug(f'unrecognized TIFF byte order: {byte_order}')
+        return {}
+
+    try:
+        ifd0_offset = unpack_from(f'{endian}L', data, 4)[0]
+    except StructError:
+        return {}
+
+    ifd0 = read_ifd(data, endian, ifd0_offset, IFD0_TAGS)
+    exif = name_tags(ifd0)
+
+    exif_offset = ifd0.get(TAG_EXIF_IFD_POINTER)
+    if isinstance(exif_offset, int):
+        exif_ifd = read_ifd(data, endian, exif_offset, IFD_TAGS[TAG_EXIF_IFD_POINTER])
+        exif.update(name_tags(exif_ifd))
+
+    gps_offset = ifd0.get(TAG_GPS_IFD_POINTER)
+    if isinstance(gps_offset, int):
+        exif[TAG_GPSINFO] = read_ifd(
+            data, endian, gps_offset, IFD_TAGS[TAG_GPS_IFD_POINTER]
+        )
+
+    return exif
+
+
+def name_tags(ifd):
+    return {TAG_IDS[k]: v for k, v in ifd.items() if k in TAG_IDS}
+
+
+def read_ifd(data, endian, offset, tags):
+    '''
+    Reads the entries of a single IFD numbered in `tags` into a dict
+    keyed by tag number.
+    '''
+    entries = {}
+    try:
+        count = unpack_from(f'{endian}H', data, offset)[0]
+    except StructError:
+        debug(f'IFD offset {offset} is outside of the EXIF block')
+        return entries
+
+    for i in range(count):
+        entry = offset + 2 + (12 * i)
+        try:
+            tag, typ, n = unpack_from(f'{endian}HHL', data, entry)
+        except StructError:
+            break
+
+        if tag not in tags or typ not in FIELD_TYPES:
+            continue
+
+        fmt, unit = FIELD_TYPES[typ]
+        size = unit * n
+        if size <= 4:
+            start = entry + 8
+        else:
+            try:
+                start = unpack_from(f'{endian}L', data, entry + 8)[0]
+            except StructError:
+                debug(f'entry of tag {tag} extends past the EXIF block')
+                break
+
+        raw = data[start : start + size]
+        if len(raw) < size:
+            debug(f'value of tag {tag} extends past the EXIF block')
+            continue
+
+        entries[tag] = decode_value(raw, endian, typ, fmt, n)
+    return entries
+
+
+def decode_value(raw, endian, typ, fmt, n):
+    if typ == ASCII:
+        raw = bytes(raw)
+        if raw.endswith(b'\x00'):
+            raw = raw[:-1]
+        return raw.decode('latin-1', 'replace')
+
+    if typ in (BYTE, UNDEFINED):
+        return bytes(raw)
+
+    values = unpack_from(f'{endian}{fmt * n}', raw)
+    if typ in (RATIONAL, SRATIONAL):
+        values = tuple(
+            Rational(values[i], values[i + 1]) for i in range(0, len(values), 2)
+        )
+    return values[0] if len(values) == 1 else values
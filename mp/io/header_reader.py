@@ -0,0 +1,175 @@
+from logging import debug
+from struct import unpack_from
+from zlib import decompress
+
+from mp.io.exif_parser import EXIF_HEADER
+
+JPEG_SIGNATURE = b'\xff\xd8'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+XMP_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+PNG_XMP_KEYWORD = b'XML:com.adobe.xmp'
+
+JPEG_APP1 = 0xE1
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7}
+JPEG_SOF |= {0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_STANDALONE = {0x01} | set(range(0xD0, 0xD8))
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class HeaderTruncatedError(Exception):
+    '''Raised when the header of an image continues past the bytes given.'''
+
+    def __init__(self, needed):
+        super().__init__(f'image header continues past byte {needed}')
+        self.needed = needed
+
+
+class UnsupportedFormatError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class ImageHeader:
+    '''Dimensions and raw metadata payloads read from the head of an image.'''
+
+    def __init__(self, size, exif=None, xmp=None):
+        self.size = size
+        self.exif = exif
+        self.xmp = xmp or []
+
+
+def read_header_from_file(image_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open(image_file, 'rb') as f:
+        return read_header_incrementally(f.read, chunk_size)
+
+
+def read_header_incrementally(read, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''
+    Reads the header of an image using `read(n)`, which returns up to the next
+    `n` bytes of the image, or no bytes at the end.  Starts with `chunk_size`
+    bytes and reads more only when the header runs past what has been read.
+    '''
+    data = read(chunk_size)
+    while True:
+        try:
+            return read_header(data)
+        except HeaderTruncatedError as e:
+            more = read(max(e.needed - len(data), len(data)))
+            if not more:
+                raise
+            debug(f'header needs {e.needed} bytes, read {len(more)} more')
+            data += more
+
+
+def read_header(data):
+    '''
+    Reads an `ImageHeader` from the leading bytes of a JPEG or PNG image. No
+    pixel data is decoded.  Raises `HeaderTruncatedError` if `data` ends
+    before the header does.
+    '''
+    if data[:2] == JPEG_SIGNATURE:
+        return read_jpeg_header(data)
+    if data[:8] == PNG_SIGNATURE:
+        return read_png_header(data)
+    if len(data) < len(PNG_SIGNATURE):
+        raise HeaderTruncatedError(len(PNG_SIGNATURE))
+    raise UnsupportedFormatError('image is neither a JPEG nor a PNG')
+
+
+def read_jpeg_header(data):
+    size = None
+    exif = None
+    xmp = []
+
+    pos = len(JPEG_SIGNATURE)
+    while True:
+        if pos + 4 > len(data):
+            raise HeaderTruncatedError(pos + 4)
+        if data[pos] != 0xFF:
+            raise UnsupportedFormatError(f'expected JPEG marker at byte {pos}')
+
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos = pos + 1
+            continue
+        if marker in JPEG_STANDALONE:
+            pos = pos + 2
+            continue
+        if marker in (JPEG_SOS, JPEG_EOI):
+            break
+
+        length = unpack_from('>H', data, pos + 2)[0]
+        if length < 2:
+            raise UnsupportedFormatError(f'invalid JPEG segment length at byte {pos}')
+        end = pos + 2 + length
+        if end > len(data):
+            raise HeaderTruncatedError(end)
+
+        segment = data[pos + 4 : end]
+        if marker == JPEG_APP1:
+            if segment[:6] == EXIF_HEADER and exif is None:
+                exif = bytes(segment[6:])
+            elif segment[: len(XMP_HEADER)] == XMP_HEADER:
+                xmp.append(bytes(segment[len(XMP_HEADER) :]))
+        elif marker in JPEG_SOF and size is None:
+            if len(segment) < 5:
+                raise UnsupportedFormatError(
+                    f'truncated JPEG frame header at byte {pos}'
+                )
+            height, width = unpack_from('>HH', segment, 1)
+            size = (width, height)
+        pos = end
+
+    if size is None:
+        raise UnsupportedFormatError('no frame header found in JPEG')
+    return ImageHeader(size, exif=exif, xmp=xmp)
+
+
+def read_png_header(data):
+    size = None
+    exif = None
+    xmp = []
+
+    pos = len(PNG_SIGNATURE)
+    while True:
+        if pos + 8 > len(data):
+            raise HeaderTruncatedError(pos + 8)
+
+        length, chunk_type = unpack_from('>L4s', data, pos)
+        if chunk_type in (b'IDAT', b'IEND'):
+            break
+
+        end = pos + 8 + length + 4  # trailing CRC
+        if end > len(data):
+            raise HeaderTruncatedError(end)
+
+        chunk = data[pos + 8 : pos + 8 + length]
+        if chunk_type == b'IHDR':
+            if len(chunk) < 8:
+                raise UnsupportedFormatError('truncated PNG IHDR chunk')
+            size = unpack_from('>LL', chunk)
+        elif chunk_type == b'eXIf':
+            exif = bytes(chunk)
+        elif chunk_type == b'iTXt':
+            packet = read_png_xmp(bytes(chunk))
+            if packet:
+                xmp.append(packet)
+        pos = end
+
+    if size is None:
+        raise UnsupportedFormatError('no IHDR chunk found in PNG')
+    return ImageHeader(size, exif=exif, xmp=xmp)
+
+
+def read_png_xmp(chunk):
+    '''Returns the XMP packet held in an iTXt chunk, if it holds one.'''
+    keyword, _, rest = chunk.partition(b'\x00')
+    if keyword != PNG_XMP_KEYWORD or len(rest) < 2:
+        return None
+    compressed = rest[0]
+    _, _, rest = rest[2:].partition(b'\x00')  # language tag
+    _, _, text = rest.partition(b'\x00')  # translated keyword
+    return decompress(text) if compressed else text
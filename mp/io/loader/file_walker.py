@@ -0,0 +1,50 @@
+from fnmatch import fnmatch
+from logging import debug, warning
+from os import scandir
+from os.path import relpath
+
+from mp.model.image_key import MIME_TYPES
+
+
+def walk_images(root, include=(), exclude=()):
+    '''
+    Lazily yields the path of every image below `root`, recognized by an
+    extension in `MIME_TYPES`.  When `include` globs are given an image must
+    match one of them, and anything matching an `exclude` glob is skipped;
+    an excluded directory is not descended into.  Globs are matched against
+    both the name and the path relative to `root`.  The images of a
+    directory are yielded in name order ahead of its subdirectories, and
+    symlinked directories are not followed.
+    '''
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            warning(f'unable to read directory {directory}: {e}')
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            path = relpath(entry.path, root)
+            if matches(entry.name, path, exclude):
+                debug(f'excluding {entry.path}')
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif entry.is_file() and is_image(entry.name):
+                if not include or matches(entry.name, path, include):
+                    yield entry.path
+        # popped from the end, so visited in name order
+        pending.extend(reversed(subdirectories))
+
+
+def is_image(name):
+    _, dot, extension = name.rpartition('.')
+    return bool(dot) and extension.lower() in MIME_TYPES
+
+
+def matches(name, path, globs):
+    return any(fnmatch(name, g) or fnmatch(path, g) for g in globs)
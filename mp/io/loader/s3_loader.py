@@ -1,13 +1,27 @@
-from logging import info, warning
+from logging import info, warning, debug
 from os import environ
+from shutil import copyfileobj
+from threading import Lock
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from mp import (
     SOURCE_BUCKET,
     DEFAULT_REGION,
+    HEADER_FETCH_SIZE,
+    S3_MAX_POOL_CONNECTIONS,
+    S3_MAX_ATTEMPTS,
 )
+from mp.io.header_reader import read_header_incrementally
+
+DEFAULT_HEADER_FETCH_SIZE = 64 * 1024
+DEFAULT_MAX_POOL_CONNECTIONS = 25
+DEFAULT_MAX_ATTEMPTS = 3
+
+_clients = {}
+_clients_lock = Lock()
 
 
 class KeyDownloadError(Exception):
@@ -15,24 +29,149 @@ class KeyDownloadError(Exception):
         super().__init__(message)
 
 
+class ObjectInfo:
+    '''What a HEAD request tells about an object in the bucket.'''
+
+    def __init__(self, key, size, etag, last_modified, content_type):
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+
+    def __repr__(self):
+        return f'ObjectInfo({self.key}, size={self.size}, etag={self.etag})'
+
+
+class RangeReader:
+    '''
+    Reads an S3 object front to back using ranged GETs, fetching only as many
+    bytes as are asked for.
+    '''
+
+    def __init__(self, s3, bucket, key, size=None):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.offset = 0
+        self.size = size
+
+    def read(self, n):
+        if self.size is not None and self.offset >= self.size:
+            return b''
+        end = self.offset + n
+        if self.size is not None:
+            end = min(end, self.size)
+        byte_range = f'bytes={self.offset}-{end - 1}'
+        debug(f'fetching {byte_range} of s3://{self.bucket}:{self.key}')
+        obj = self.s3.get_object(Bucket=self.bucket, Key=self.key, Range=byte_range)
+        self.size = int(obj['ContentRange'].rsplit('/', 1)[1])
+        data = obj['Body'].read()
+        self.offset = self.offset + len(data)
+        return data
+
+
+def s3_client(region=DEFAULT_REGION):
+    '''
+    Returns the S3 client for `region`, creating it on first use. Clients are
+    thread safe and cached for the life of the process, as building one is
+    expensive.
+    '''
+    pool_size = int(environ.get(S3_MAX_POOL_CONNECTIONS, DEFAULT_MAX_POOL_CONNECTIONS))
+    attempts = int(environ.get(S3_MAX_ATTEMPTS, DEFAULT_MAX_ATTEMPTS))
+    client_key = (region, pool_size, attempts)
+
+    # creating clients from the default session is not thread safe
+    with _clients_lock:
+        client = _clients.get(client_key)
+        if not client:
+            debug(f'creating s3 client for {region}')
+            config = Config(
+                max_pool_connections=pool_size,
+                retries={'max_attempts': attempts, 'mode': 'standard'},
+            )
+            client = boto3.client('s3', region_name=region, config=config)
+            _clients[client_key] = client
+        return client
+
+
 def key_exists(key, region=DEFAULT_REGION):
+    '''
+    Looks up `key` with a HEAD request. Returns an `ObjectInfo` describing
+    the object, or None when there is no such object.
+    '''
     bucket = environ[SOURCE_BUCKET]
-    s3 = boto3.client('s3', region_name=region)
-    objs = s3.list_objects_v2(Bucket=bucket, MaxKeys=1, Prefix=key)
-    sc = objs.get('ResponseMetadata', {}).get('HTTPStatusCode')
-    return sc == 200
+    s3 = s3_client(region)
+    try:
+        obj = s3.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return ObjectInfo(
+        key,
+        obj.get('ContentLength'),
+        obj.get('ETag'),
+        obj.get('LastModified'),
+        obj.get('ContentType'),
+    )
 
 
 def download_file_from_s3(key, dest, region=DEFAULT_REGION):
     bucket = environ[SOURCE_BUCKET]
 
     info(f'downloading s3://{bucket}:{key} to {dest}')
-    s3 = boto3.resource('s3', region_name=region)
+    s3 = s3_client(region)
 
     try:
-        s3_obj = s3.Object(bucket, key.file_path)
-        s3_obj.download_file(dest)
+        s3.download_file(bucket, key.file_path, dest)
         info(f'{key} downloaded to {dest}')
     except Exception as e:
         warning(f'ERROR: {bucket}/{key}: {e}')
         raise KeyDownloadError(f'{bucket}/{key} not found: {e}')
+
+
+def download_fileobj_from_s3(key, fileobj, region=DEFAULT_REGION):
+    '''
+    Streams the object at `key` into the binary file-like `fileobj`, and
+    returns the size of the object.
+    '''
+    bucket = environ[SOURCE_BUCKET]
+
+    info(f'downloading s3://{bucket}:{key} to memory')
+    s3 = s3_client(region)
+
+    try:
+        obj = s3.get_object(Bucket=bucket, Key=key.file_path)
+        copyfileobj(obj['Body'], fileobj)
+        info(f'{key} downloaded ({obj["ContentLength"]} bytes)')
+        return obj['ContentLength']
+    except Exception as e:
+        warning(f'ERROR: {bucket}/{key}: {e}')
+        raise KeyDownloadError(f'{bucket}/{key} not found: {e}')
+
+
+def fetch_header_from_s3(key, fetch_size=None, object_info=None, region=DEFAULT_REGION):
+    '''
+    Reads the header of an image with ranged GETs, starting with `fetch_size`
+    bytes and widening the range only when the header runs past it. Returns
+    the `ImageHeader` and the size of the whole object. An `ObjectInfo`
+    from `key_exists` may be passed to save requesting past the object's end.
+    '''
+    bucket = environ[SOURCE_BUCKET]
+    if not fetch_size:
+        fetch_size = int(environ.get(HEADER_FETCH_SIZE, DEFAULT_HEADER_FETCH_SIZE))
+
+    info(f'fetching header of s3://{bucket}:{key}')
+    s3 = s3_client(region)
+    size = object_info.size if object_info else None
+    reader = RangeReader(s3, bucket, key.file_path, size=size)
+
+    try:
+        header = read_header_incrementally(reader.read, fetch_size)
+    except ClientError as e:
+        warning(f'ERROR: {bucket}/{key}: {e}')
+        raise KeyDownloadError(f'{bucket}/{key} not found: {e}')
+
+    info(f'{key} header read from {reader.offset} of {reader.size} bytes')
+    return header, reader.size
@@ -1,57 +1,171 @@
 from logging import warning, debug
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from datetime import timezone
+from multiprocessing import get_context
 from pathlib import Path
 from fractions import Fraction
-
-from PIL.Image import open as pillow_open
-from PIL.ExifTags import TAGS
-from lxml import etree
+from io import BytesIO, SEEK_END
 
 from mp.model import *
 from mp.io.metadata_tags import *
+from mp.io.exif_parser import parse_exif
+from mp.io.xmp_reader import scan_xmp
+from mp.io.header_reader import (
+    XMP_HEADER,
+    UnsupportedFormatError,
+    read_header,
+    read_header_from_file,
+    read_header_incrementally,
+)
 from mp.model.metadata import Metadata
 from mp.model.utils import parse_date
 
 
-def extract_metadata(image_key, image_file):
+def extract_metadata(
+    image_key, image_file, header_only=False, file_size=None, etag=None
+):
+    '''
+    Reads the metadata of an image given as a path, a bytes-like object or a
+    binary file-like object.  `file_size` is the size of the whole image, and
+    when not given is taken from `image_file`.  `etag` is recorded as is.
+
+    When `header_only` is set the metadata is read by walking the leading
+    segments of the image, without involving Pillow; formats that walker does
+    not support fall back to Pillow.
+    '''
+    if file_size is None:
+        file_size = size_of(image_file)
+
+    if header_only:
+        try:
+            header = read_header_from_source(image_file)
+            return extract_metadata_from_header(image_key, header, file_size, etag)
+        except UnsupportedFormatError as e:
+            warning(f'Unable to read header of {image_key} ({e}), using Pillow.')
+            if is_file_like(image_file):
+                image_file.seek(0)
+
+    # Imported here so that callers reading only headers never load Pillow
+    # or its format plugins.
+    from PIL.Image import open as pillow_open
+
+    if isinstance(image_file, (bytes, bytearray, memoryview)):
+        image_file = BytesIO(image_file)
+
+    with pillow_open(image_file) as img:
+        # decoded from the raw block, so that only the tags used are read
+        exif = parse_exif(img.info.get('exif'))
+        xmp = extract_xmp_packets(getattr(img, 'applist', []))
+        return build_metadata(image_key, file_size, exif, img.size, xmp, etag)
+
+
+PENDING_PER_JOB = 4
+
+
+def extract_metadata_many(images, header_only=False, jobs=1, ordered=False):
+    '''
+    Extracts the metadata of each `(image_key, image_file)` pair in `images`,
+    yielding each as soon as it is read.  With more than one of `jobs` the
+    images are read in that many processes, and are yielded in the order
+    they complete unless `ordered` is set.  At most `PENDING_PER_JOB` images
+    per process are read ahead of the caller.
+    '''
+    if jobs <= 1:
+        for image_key, image_file in images:
+            yield extract_metadata(image_key, image_file, header_only)
+        return
+
+    # forking a process that runs threads, e.g. those of pyarrow or duckdb,
+    # can deadlock the child
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn')) as pool:
+        pending = deque()
+        for image_key, image_file in images:
+            debug(f'submitting {image_file} for key {image_key}')
+            pending.append(
+                pool.submit(extract_metadata, image_key, image_file, header_only)
+            )
+            if len(pending) >= jobs * PENDING_PER_JOB:
+                yield next_completed(pending, ordered)
+        while pending:
+            yield next_completed(pending, ordered)
+
+
+def next_completed(pending, ordered):
+    '''Removes a finished future from `pending` and returns its result.'''
+    if ordered:
+        future = pending.popleft()
+    else:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        future = next(f for f in pending if f in done)
+        pending.remove(future)
+    return future.result()
+
+
+def is_file_like(image_file):
+    return hasattr(image_file, 'read')
+
+
+def size_of(image_file):
+    if isinstance(image_file, (bytes, bytearray, memoryview)):
+        return len(image_file)
+    if is_file_like(image_file):
+        pos = image_file.tell()
+        size = image_file.seek(0, SEEK_END)
+        image_file.seek(pos)
+        return size
+    return Path(image_file).stat().st_size
+
+
+def read_header_from_source(image_file):
+    if isinstance(image_file, (bytes, bytearray, memoryview)):
+        return read_header(image_file)
+    if is_file_like(image_file):
+        return read_header_incrementally(image_file.read)
+    return read_header_from_file(image_file)
+
+
+def extract_metadata_from_header(image_key, header, file_size, etag=None):
+    exif = parse_exif(header.exif)
+    return build_metadata(image_key, file_size, exif, header.size, header.xmp, etag)
+
+
+def build_metadata(image_key, file_size, exif, size, xmp, etag=None):
     md = {
         IMAGE_ID: image_key.image_id,
         OWNER_ID: image_key.owner_id,
         FILE_PATH: image_key.file_path,
-        FILE_SIZE: Path(image_file).stat().st_size,
+        FILE_SIZE: file_size,
+        ETAG: etag,
         MIME_TYPE: image_key.mime_type,
     }
 
-    with pillow_open(image_file) as img:
-        dic = img._getexif() or {}
-        exif = {TAGS.get(k): v for k, v in dic.items()}
-
-        cd = extract_createdate_exif(exif)
-        if not cd:
-            warning(f'No create date in EXIF metadata of {image_key}, using XMP.')
-            cd = extract_createdate_xmp(img, image_key)
-        if not cd:
-            raise ValueError(f'unable to read create date for {image_key}')
-        debug(f'Found create date {cd} for image {image_key}')
-        md[CREATE_DATE] = cd
+    cd = extract_createdate_exif(exif)
+    if not cd:
+        warning(f'No create date in EXIF metadata of {image_key}, using XMP.')
+        cd = extract_createdate_xmp(xmp, image_key)
+    if not cd:
+        raise ValueError(f'unable to read create date for {image_key}')
+    debug(f'Found create date {cd} for image {image_key}')
+    md[CREATE_DATE] = cd
 
-        md[ARTIST] = resolve_val(exif, [TAG_IMAGE_ARTIST])
-        md[CAMERA_MAKE] = resolve_val(exif, [TAG_IMAGE_MAKE])
-        md[CAMERA_MODEL] = resolve_val(exif, [TAG_IMAGE_MODEL])
-        md[ISO_SPEED] = resolve_val(exif, [TAG_PHOTO_ISOSPEEDRATINGS])
+    md[ARTIST] = resolve_val(exif, [TAG_IMAGE_ARTIST])
+    md[CAMERA_MAKE] = resolve_val(exif, [TAG_IMAGE_MAKE])
+    md[CAMERA_MODEL] = resolve_val(exif, [TAG_IMAGE_MODEL])
+    md[ISO_SPEED] = resolve_val(exif, [TAG_PHOTO_ISOSPEEDRATINGS])
 
-        md[APERTURE] = extract_aperture(exif)
+    md[APERTURE] = extract_aperture(exif)
 
-        ss = extract_shutter_speed(exif)
-        (md[SHUTTER_SPEED], md[SHUTTER_SPEED_N], md[SHUTTER_SPEED_D]) = ss
+    ss = extract_shutter_speed(exif)
+    (md[SHUTTER_SPEED], md[SHUTTER_SPEED_N], md[SHUTTER_SPEED_D]) = ss
 
-        ff = extract_focal_length(exif)
-        md[FOCAL_LENGTH], md[FOCAL_LENGTH_N], md[FOCAL_LENGTH_D] = ff
+    ff = extract_focal_length(exif)
+    md[FOCAL_LENGTH], md[FOCAL_LENGTH_N], md[FOCAL_LENGTH_D] = ff
 
-        md[IMAGE_WIDTH], md[IMAGE_HEIGHT] = img.size
+    md[IMAGE_WIDTH], md[IMAGE_HEIGHT] = size
 
-        gps = extract_gps_coords(exif)
-        md[GPS_LAT], md[GPS_LON], md[GPS_ALT], md[GPS_DATE_TIME] = gps
+    gps = extract_gps_coords(exif)
+    md[GPS_LAT], md[GPS_LON], md[GPS_ALT], md[GPS_DATE_TIME] = gps
 
     debug(f'Metadata for {image_key}: {md}')
     return Metadata(args=md)
@@ -67,27 +181,26 @@ def extract_createdate_exif(md):
     return parse_date(dt)
 
 
-def extract_createdate_xmp(image, image_key):
-    for segment, content in image.applist:
+def extract_xmp_packets(applist):
+    '''Returns the XMP packets found in a Pillow JPEG `applist`.'''
+    return [
+        content[len(XMP_HEADER) :]
+        for segment, content in applist
+        if segment == 'APP1' and content.startswith(XMP_HEADER)
+    ]
+
+
+def extract_createdate_xmp(packets, image_key):
+    for packet in packets:
         try:
-            marker, body = content.decode('utf-8').split('\x00', 1)
-        except:
-            continue
-        if segment == 'APP1' and marker == 'http://ns.adobe.com/xap/1.0/':
-            try:
-                create_date_xpath = '//@xmp:CreateDate'
-                xml = etree.fromstring(body)
-                date = xml.xpath(
-                    '//@xmp:CreateDate',
-                    namespaces={'xmp': 'http://ns.adobe.com/xap/1.0/'},
-                )
-                if date and len(date) > 0:
-                    # XMP Create Date includes a TZ, but we remove
-                    # it to conform with EXIF create dates, which do
-                    # not include it
-                    return parse_date(date[0])
-            except Exception as e:  # pragma: no cover
-                warning(f'Exception with image [{image_key}] parsing XMP XML: {e}')
+            date = scan_xmp(packet, [XMP_CREATEDATE]).get(XMP_CREATEDATE)
+            if date:
+                # XMP Create Date includes a TZ, but we remove
+                # it to conform with EXIF create dates, which do
+                # not include it
+                return parse_date(date)
+        except Exception as e:  # pragma: no cover
+            warning(f'Exception with image [{image_key}] parsing XMP XML: {e}')
 
 
 def extract_focal_length(md):
@@ -14,6 +14,9 @@ TAG_PHOTO_PIXELXDIMENSION = 'PixelXDimension'
 TAG_PHOTO_PIXELYDIMENSION = 'PixelYDimension'
 TAG_PHOTO_SHUTTERSPEEDVALUE = 'ShutterSpeedValue'
 
+XMP_NS = 'http://ns.adobe.com/xap/1.0/'
+XMP_CREATEDATE = f'{{{XMP_NS}}}CreateDate'
+
 TAG_GPSINFO = 'GPSInfo'
 TAG_GPSINFO_GPSALTITUDE = 6
 TAG_GPSINFO_GPSDATESTAMP = 29
@@ -22,3 +25,35 @@ TAG_GPSINFO_GPSLATITUDEREF = 1
 TAG_GPSINFO_GPSLONGITUDE = 4
 TAG_GPSINFO_GPSLONGITUDEREF = 3
 TAG_GPSINFO_GPSTIMESTAMP = 7
+
+GPS_TAG_IDS = (
+    TAG_GPSINFO_GPSALTITUDE,
+    TAG_GPSINFO_GPSDATESTAMP,
+    TAG_GPSINFO_GPSLATITUDE,
+    TAG_GPSINFO_GPSLATITUDEREF,
+    TAG_GPSINFO_GPSLONGITUDE,
+    TAG_GPSINFO_GPSLONGITUDEREF,
+    TAG_GPSINFO_GPSTIMESTAMP,
+)
+
+# Numeric ids of the tags above, used when decoding EXIF without Pillow.
+TAG_EXIF_IFD_POINTER = 0x8769
+TAG_GPS_IFD_POINTER = 0x8825
+
+TAG_IDS = {
+    0x013B: TAG_IMAGE_ARTIST,
+    0x0132: TAG_IMAGE_DATETIME,
+    0x0101: TAG_IMAGE_IMAGELENGTH,
+    0x0100: TAG_IMAGE_IMAGEWIDTH,
+    0x010F: TAG_IMAGE_MAKE,
+    0x0110: TAG_IMAGE_MODEL,
+    0x9202: TAG_PHOTO_APERTUREVALUE,
+    0x9004: TAG_PHOTO_DATETIMEDIGITIZED,
+    0x9003: TAG_PHOTO_DATETIMEORIGINAL,
+    0x920A: TAG_PHOTO_FOCALLENGTH,
+    0xA405: TAG_PHOTO_FOCALLENGTHIN35MMFILM,
+    0x8827: TAG_PHOTO_ISOSPEEDRATINGS,
+    0xA002: TAG_PHOTO_PIXELXDIMENSION,
+    0xA003: TAG_PHOTO_PIXELYDIMENSION,
+    0x9201: TAG_PHOTO_SHUTTERSPEEDVALUE,
+}
@@ -0,0 +1,166 @@
+'''
+Writers of metadata to typed, columnar files: Parquet & Arrow IPC.  These
+require `pyarrow`, installed with the `columnar` extra.
+'''
+from logging import info, debug
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from mp.io.writer.metadata_sql import _columns, _sql_types
+from mp.io.writer.metadata_writer import MetadataWriter
+from mp.model.batch import DictionaryColumn, MetadataBatch, NumericColumn
+
+DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+DEFAULT_COMPRESSION = 'zstd'
+
+# leading words of a column's sql type -> arrow type
+_arrow_types = {
+    'uuid': pa.string(),
+    'varchar': pa.string(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'double precision': pa.float64(),
+    'timestamp with time zone': pa.timestamp('us', tz='UTC'),
+    'timestamp without time zone': pa.timestamp('us'),
+    'timestamp': pa.timestamp('us'),
+}
+
+
+def arrow_type(sql_type):
+    for prefix in sorted(_arrow_types, key=len, reverse=True):
+        if sql_type.startswith(prefix):
+            return _arrow_types[prefix]
+    raise ValueError(f'no arrow type for sql type: {sql_type}')
+
+
+def arrow_schema():
+    '''Schema of the metadata table, with columns in the order they are written.'''
+    return pa.schema(
+        [
+            pa.field(
+                c, arrow_type(_sql_types[c]), nullable='not null' not in _sql_types[c]
+            )
+            for c in _columns
+        ]
+    )
+
+
+class ColumnarMetadataWriter(MetadataWriter):
+    '''
+    Buffers metadata into batches of `row_group_size` rows, each written as
+    one row group or record batch of `output`, a path or binary file-like
+    object, with `compression`.  The file is complete only once the writer
+    is exited, so can not be resumed after an interrupted run.
+    '''
+
+    def __init__(
+        self,
+        output,
+        row_group_size=DEFAULT_ROW_GROUP_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ):
+        self.output = output
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = arrow_schema()
+        self.batch = MetadataBatch()
+        self.sink = None
+
+    def __enter__(self):
+        debug(f'{type(self).__name__}: entering context')
+        if self.sink is None:
+            self.sink = self.open_sink()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        debug(f'{type(self).__name__}: exiting context')
+        self.flush()
+        self.sink.close()
+        self.sink = None
+
+    def write(self, metadata):
+        self.batch.append(metadata)
+        if len(self.batch) >= self.row_group_size:
+            self.flush()
+        return None
+
+    def commit(self):
+        '''Writes the rows buffered so far as a row group, even if not yet full.'''
+        self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        info(f'writing batch of {len(self.batch)} rows.')
+        self.write_table(to_arrow_table(self.batch, self.schema))
+        self.batch.clear()
+
+    def open_sink(self):  # pragma: no cover
+        pass
+
+    def write_table(self, table):  # pragma: no cover
+        pass
+
+
+class ParquetMetadataWriter(ColumnarMetadataWriter):
+    def open_sink(self):
+        return pq.ParquetWriter(self.output, self.schema, compression=self.compression)
+
+    def write_table(self, table):
+        self.sink.write_table(table, row_group_size=self.row_group_size)
+
+
+class ArrowMetadataWriter(ColumnarMetadataWriter):
+    def open_sink(self):
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(self.output, self.schema, options=options)
+
+    def write_table(self, table):
+        self.sink.write_table(table, max_chunksize=self.row_group_size)
+
+
+def to_arrow_table(batch, schema):
+    '''
+    Builds a table of `schema` from `batch`, a `MetadataBatch`.  Numbers &
+    timestamps are handed to arrow as the buffers of the batch's arrays,
+    without copying, so the batch must not be appended to while the table
+    is in use.
+    '''
+    columns = [to_arrow_array(batch.columns[f.name], f.type) for f in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def to_arrow_array(column, arrow_type):
+    if isinstance(column, NumericColumn):
+        return pa.Array.from_buffers(
+            arrow_type,
+            len(column),
+            [validity_bitmap(column), pa.py_buffer(column.data)],
+            null_count=column.nulls,
+        )
+    if isinstance(column, DictionaryColumn):
+        indices = pa.Array.from_buffers(
+            pa.int32(), len(column), [None, pa.py_buffer(column.codes)]
+        )
+        dictionary = pa.array(column.values, type=arrow_type)
+        return pa.DictionaryArray.from_arrays(indices, dictionary).dictionary_decode()
+    return pa.array(column.values, type=arrow_type)
+
+
+def validity_bitmap(column):
+    '''Packs the validity flags of a column with nulls into the bitmap arrow expects.'''
+    if not column.nulls:
+        return None
+    flags = pa.Array.from_buffers(
+        pa.uint8(), len(column), [None, pa.py_buffer(column.valid)]
+    )
+    return pc.not_equal(flags, 0).buffers()[1]
+
+
+columnar_writers = {
+    'parquet': ParquetMetadataWriter,
+    'arrow': ArrowMetadataWriter,
+}
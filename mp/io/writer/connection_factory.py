@@ -1,12 +1,25 @@
-from logging import info, debug
+from collections import deque
+from logging import info, debug, warning
 from os import makedirs
 from pathlib import Path
+from threading import Lock
+from time import monotonic
 
 import psycopg2
 import duckdb
 
 from mp.io.writer import DUCKDB, POSTGRESQL
-from mp.io.writer.metadata_sql import create as create_metadata_table
+from mp.io.writer.metadata_sql import (
+    create as create_metadata_table,
+    migrations,
+    table_columns,
+)
+
+
+DEFAULT_POOL_IDLE_TIMEOUT = 300
+
+_pools = {}
+_pools_lock = Lock()
 
 
 class ConnectionFactory:
@@ -14,18 +27,116 @@ class ConnectionFactory:
         self.dbinfo = dbinfo
 
     @staticmethod
-    def instance(db):
+    def instance(db, pool_size=0, idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT):
+        '''
+        Creates a connection factory for `db`. When `pool_size` is given, the
+        process wide pool of connections to `db` is returned instead.
+        '''
         dbtype = db['dbtype']
         if dbtype not in SUPPORTED_DBS:
             raise Exception(f'unsupported db type: {dbtype}')
 
-        info(f'Creating instance of {dbtype} connection factory.')
         factory = SUPPORTED_DBS[dbtype]
+        if pool_size:
+            return PooledConnectionFactory.shared(factory, db, pool_size, idle_timeout)
+
+        info(f'Creating instance of {dbtype} connection factory.')
         return factory(db)
 
     def connect(self):  # pragma: no cover
         pass
 
+    def release(self, connection):
+        '''Called by writers when they are done with a connection.'''
+        connection.close()
+
+    def migrate(self, connection):
+        '''
+        Adds to an existing metadata table the columns introduced since it
+        was created.  A missing table is left to be created elsewhere.
+        '''
+        c = connection.cursor()
+        c.execute(table_columns())
+        columns = [r[0] for r in c.fetchall()]
+        if columns:
+            for statement in migrations(columns, self.dbinfo['dbtype']):
+                info(f'Migrating metadata table: {statement}')
+                c.execute(statement)
+        c.close()
+        connection.commit()
+
+
+class PooledConnectionFactory(ConnectionFactory):
+    '''
+    Keeps up to `size` connections made by `factory` open once released, so
+    they can be reused; e.g. across warm invocations of a Lambda. Connections
+    idle for longer than `idle_timeout` seconds, or that fail a health check
+    when borrowed, are closed and replaced.
+    '''
+
+    def __init__(self, factory, size, idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT):
+        ConnectionFactory.__init__(self, factory.dbinfo)
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.idle = deque()
+        self.lock = Lock()
+
+    @staticmethod
+    def shared(factory_type, db, size, idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT):
+        '''Returns the process wide pool for `db`, creating it if needed.'''
+        with _pools_lock:
+            pool = _pools.get(db['url'])
+            if not pool:
+                info(f'Creating pool of {size} {db["dbtype"]} connections.')
+                pool = PooledConnectionFactory(factory_type(db), size, idle_timeout)
+                _pools[db['url']] = pool
+            return pool
+
+    def connect(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                connection, released_at = self.idle.pop()
+
+            if monotonic() - released_at > self.idle_timeout:
+                debug('Closing connection that was idle too long.')
+                self.discard(connection)
+            elif self.healthy(connection):
+                debug('Reusing pooled connection.')
+                return connection
+            else:
+                warning('Pooled connection failed health check, discarding it.')
+                self.discard(connection)
+
+        debug('Opening new connection for pool.')
+        return self.factory.connect()
+
+    def release(self, connection):
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append((connection, monotonic()))
+                return
+        self.discard(connection)
+
+    def healthy(self, connection):
+        try:
+            c = connection.cursor()
+            c.execute('select 1')
+            c.fetchone()
+            c.close()
+            return True
+        except Exception as e:
+            debug(f'health check failed: {e}')
+            return False
+
+    def discard(self, connection):
+        try:
+            self.factory.release(connection)
+        except Exception as e:  # pragma: no cover
+            debug(f'error closing connection: {e}')
+
 
 class DuckdbConnectionFactory(ConnectionFactory):
     def connect(self):
@@ -40,11 +151,17 @@ class DuckdbConnectionFactory(ConnectionFactory):
         debug('Creating table if it does not exist')
         c = self.connection.cursor()
         c.execute(create_metadata_table())
+        c.close()
+        self.migrate(self.connection)
 
         return self.connection
 
 
 class PostgresqlConnectionFactory(ConnectionFactory):
+    def __init__(self, dbinfo):
+        ConnectionFactory.__init__(self, dbinfo)
+        self.migrated = False
+
     def connect(self):
         self.connection = psycopg2.connect(
             host=self.dbinfo.get('hostname'),
@@ -53,6 +170,10 @@ class PostgresqlConnectionFactory(ConnectionFactory):
             password=self.dbinfo.get('password'),
             database=self.dbinfo.get('dbname'),
         )
+        # once per factory, i.e. per process when pooled
+        if not self.migrated:
+            self.migrate(self.connection)
+            self.migrated = True
         return self.connection
 
 
@@ -0,0 +1,59 @@
+from logging import info, debug, warning
+
+from mp.io.writer.columnar_writer import arrow_schema, to_arrow_table
+from mp.io.writer.metadata_sql import upsert_select
+from mp.io.writer.metadata_writer import BulkMetadataWriter, DEFAULT_BULK_SIZE
+
+BATCH_VIEW = 'metadata_batch'
+
+
+class DuckdbMetadataWriter(BulkMetadataWriter):
+    '''
+    Writes metadata to DuckDB in bulk.  Each batch is registered with DuckDB
+    as an Arrow table and upserted with a single `insert ... select`, rather
+    than passed row by row as parameters of a statement.
+
+    Batches are written in a transaction, so that nothing written since the
+    last commit is kept when the writer exits on an exception.
+    '''
+
+    def __init__(self, connection_factory, bulk_size=DEFAULT_BULK_SIZE):
+        BulkMetadataWriter.__init__(self, connection_factory, bulk_size)
+        self.schema = arrow_schema()
+
+    def __enter__(self):
+        BulkMetadataWriter.__enter__(self)
+        # statements run on the cursor, which duckdb runs as a connection of its own
+        self.cursor.begin()
+        return self
+
+    def commit_transaction(self):
+        debug('committing.')
+        self.cursor.commit()
+        self.cursor.begin()
+
+    def end_transaction(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_val is None:
+                self.cursor.commit()
+            else:
+                warning(f'exception {exc_type} when closing db handle: {exc_val}')
+                self.cursor.rollback()
+        finally:
+            # closing the cursor discards a transaction left open
+            self.cursor.close()
+            self.connection_factory.release(self.connection)
+            debug('Database connection released.')
+
+    def flush(self):
+        if not self.batch:
+            return
+        info(f'bulk upserting batch of {len(self.batch)} rows.')
+        table = to_arrow_table(self.batch, self.schema)
+        self.cursor.register(BATCH_VIEW, table)
+        try:
+            debug('executing "upsert_select"')
+            self.cursor.execute(upsert_select(BATCH_VIEW))
+        finally:
+            self.cursor.unregister(BATCH_VIEW)
+        self.batch.clear()
@@ -50,8 +50,8 @@ class DatabaseExceptionEventWriter(ExceptionEventWriter):  # pragma: no cover
             self.connection.rollback()
         else:
             self.connection.commit()
-        self.connection.close()
-        debug('Database connection closed.')
+        self.connection_factory.release(self.connection)
+        debug('Database connection released.')
 
     def write(self, event):
         debug(f'writing event {event}')
@@ -2,42 +2,65 @@ from datetime import datetime
 from json import dumps
 from uuid import UUID
 
+# characters that require a csv field to be quoted
+_csv_special = (',', '"', '\n', '\r')
+
+
+def csv_row(values):
+    '''
+    Encodes `values` as one line of csv: missing values are left empty, and
+    only values containing a delimiter, quote or line break are quoted.
+    '''
+    return ','.join([csv_field(v) for v in values]) + '\n'
+
+
+def csv_field(value):
+    if value is None:
+        return ''
+    s = str(value)
+    if any(c in s for c in _csv_special):
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
 
 def csv_formatter(data):
     if data and len(data) > 0:
         keys = sorted(data.keys())
-        s = ','.join(keys) + '\n'
-        for k in keys:
-            v = str(data[k]) if data[k] is not None else ''
-            s = s + v + ','
-        return s[:-1] + '\n'
+        return csv_row(keys) + csv_row([data[k] for k in keys])
     else:
         return ''
 
 
 def txt_formatter(data):
     if data:
-        s = ''
-        for k in sorted(data.keys()):
-            s = s + f'{k}={data[k]}\n'
-        return s
+        return ''.join([f'{k}={data[k]}\n' for k in sorted(data.keys())])
     else:
         return None
 
 
+def json_converter(o):
+    if isinstance(o, UUID):
+        return str(o)
+    if isinstance(o, datetime):
+        return o.isoformat()
+
+
 def json_formatter(data):
-    def converter(o):
-        if isinstance(o, UUID):
-            return str(o)
-        if isinstance(o, datetime):
-            return o.isoformat()
+    if data:
+        return dumps(data, indent=4, default=json_converter)
 
+
+def ndjson_formatter(data):
+    '''Formats `data` as a single line of json, so that each record is one line.'''
     if data:
-        return dumps(data, indent=4, default=converter)
+        return dumps(data, separators=(',', ':'), default=json_converter) + '\n'
+    else:
+        return ''
 
 
 formatters = {
     'csv': csv_formatter,
     'txt': txt_formatter,
     'json': json_formatter,
+    'ndjson': ndjson_formatter,
 }
@@ -1,15 +1,14 @@
 from logging import info, debug
-from types import ModuleType
 
 from mp import model
+from mp.model.metadata import COLUMNS
 
 table_name = 'media_item'
+staging_table_name = f'{table_name}_staging'
 
-_columns = [
-    getattr(model, item)
-    for item in sorted(dir(model))
-    if not item.startswith('__') and not isinstance(getattr(model, item), ModuleType)
-]
+_columns = list(COLUMNS)
+# the columns of a row updated in place: its id & file path are kept
+_update_columns = [c for c in _columns if c not in (model.IMAGE_ID, model.FILE_PATH)]
 
 from mp.io.writer import DUCKDB, POSTGRESQL
 
@@ -24,6 +23,7 @@ _sql_types = {
     model.CREATE_DATE: 'timestamp without time zone not null',
     model.CREATE_DAY_ID: 'integer not null',
     model.FILE_SIZE: 'bigint',
+    model.ETAG: 'varchar',
     model.FOCAL_LENGTH: 'varchar',
     model.FOCAL_LENGTH_N: 'integer',
     model.FOCAL_LENGTH_D: 'integer',
@@ -42,33 +42,160 @@ _sql_types = {
 
 
 def create(dbtype=DUCKDB):
+    sql_types = dict(_sql_types)
     if dbtype == DUCKDB:
         # some data types not yet supported by duckdb
-        _sql_types[model.IMAGE_ID] = 'varchar primary key'
-        _sql_types[model.OWNER_ID] = 'varchar not null'
-        _sql_types[model.GPS_DATE_TIME] = 'timestamp'
-    column_decls = ', '.join([f'{k} {v}' for k, v in _sql_types.items()])
+        sql_types[model.IMAGE_ID] = 'varchar primary key'
+        sql_types[model.OWNER_ID] = 'varchar not null'
+        sql_types[model.GPS_DATE_TIME] = 'timestamp'
+    column_decls = ', '.join([f'{k} {v}' for k, v in sql_types.items()])
     return f'create table if not exists {table_name} ({column_decls})'
 
 
-def insert():
+# columns introduced after the table was first created
+_added_columns = [model.ETAG]
+
+
+def table_columns():
+    debug('building table columns query')
+    return (
+        'select column_name from information_schema.columns '
+        f"where table_schema = current_schema() and table_name = '{table_name}'"
+    )
+
+
+def migrations(columns, dbtype=DUCKDB):
+    '''
+    Statements adding to a table with `columns` those introduced since it
+    was created.
+    '''
+    return [add_column(c, dbtype) for c in _added_columns if c not in columns]
+
+
+def add_column(column, dbtype=DUCKDB):
+    '''Adds `column` to a table created before the column was introduced.'''
+    debug(f'building add column statement for {column}')
+    return (
+        f'alter table {table_name} '
+        f'add column if not exists {column} {_sql_types[column]}'
+    )
+
+
+def placeholder(dbtype=DUCKDB):
+    return '%s' if dbtype == POSTGRESQL else '?'
+
+
+def insert(dbtype=DUCKDB):
     debug(f'building insert statement')
     cols = ', '.join(_columns)
-    vals = ('?, ' * len(_columns)).rstrip().rstrip(',')
+    vals = ', '.join([placeholder(dbtype)] * len(_columns))
     return f'insert into {table_name} ({cols}) values ({vals}) returning id'
 
 
-def update():
+def update(dbtype=DUCKDB):
+    '''
+    Updates the row of a file path, keeping its id, as an upsert does; the
+    file path is the last parameter.
+    '''
     debug(f'building update statement')
-    update_pairs = ', '.join([f'{c} = ?' for c in _columns if not c == model.IMAGE_ID])
-    return f'update {table_name} set {update_pairs} where {model.IMAGE_ID} = ? returning id'
+    p = placeholder(dbtype)
+    update_pairs = ', '.join([f'{c} = {p}' for c in _update_columns])
+    return (
+        f'update {table_name} set {update_pairs} '
+        f'where {model.FILE_PATH} = {p} returning id'
+    )
+
+
+def upsert(dbtype=DUCKDB):
+    '''Inserts a row, or updates the row that already has its file path.'''
+    return upsert_many(dbtype, 1)
 
 
-def delete():
+def upsert_many(dbtype=DUCKDB, count=1):
+    '''
+    Inserts `count` rows in one statement, updating the rows whose file path
+    already exists. Returns the id & file path of each row written.
+    '''
+    debug(f'building upsert statement for {count} rows')
+    cols = ', '.join(_columns)
+    row = '(' + ', '.join([placeholder(dbtype)] * len(_columns)) + ')'
+    rows = ', '.join([row] * count)
+    return (
+        f'insert into {table_name} ({cols}) values {rows} {on_conflict_update()} '
+        f'returning {model.IMAGE_ID}, {model.FILE_PATH}'
+    )
+
+
+def upsert_select(source):
+    '''
+    Inserts every row of the table or view `source`, which has the columns
+    of the metadata table, updating the rows whose file path already exists.
+    '''
+    debug(f'building upsert statement selecting from {source}')
+    cols = ', '.join(_columns)
+    return (
+        f'insert into {table_name} ({cols}) '
+        f'select {cols} from {source} {on_conflict_update()}'
+    )
+
+
+def create_staging():
+    '''
+    A temporary table with the columns of the metadata table, for rows to
+    be merged into it.
+    '''
+    debug(f'building create staging table statement')
+    return (
+        f'create temporary table if not exists {staging_table_name} (like {table_name})'
+    )
+
+
+def copy_to_staging():
+    '''Loads the rows of a CSV file passed on stdin into the staging table.'''
+    debug(f'building copy statement')
+    cols = ', '.join(_columns)
+    return f'copy {staging_table_name} ({cols}) from stdin with (format csv)'
+
+
+def truncate_staging():
+    return f'truncate {staging_table_name}'
+
+
+def on_conflict_update():
+    update_pairs = ', '.join([f'{c} = excluded.{c}' for c in _update_columns])
+    return f'on conflict ({model.FILE_PATH}) do update set {update_pairs}'
+
+
+def delete(dbtype=DUCKDB):
     debug(f'building delete statement')
-    return f'delete from {table_name} where {model.IMAGE_ID} = ? returning id'
+    return f'delete from {table_name} where {model.IMAGE_ID} = {placeholder(dbtype)} returning id'
 
 
-def exists():
+def exists(dbtype=DUCKDB):
     debug(f'building exists statement')
-    return f'select 1 from {table_name} where {model.FILE_PATH} = ?'
+    return f'select 1 from {table_name} where {model.FILE_PATH} = {placeholder(dbtype)}'
+
+
+def exists_many(dbtype=DUCKDB, count=1):
+    '''Selects which of `count` file paths are already present.'''
+    debug(f'building exists statement for {count} paths')
+    if dbtype == POSTGRESQL:
+        # paths are passed as a single array parameter
+        where = f'{model.FILE_PATH} = any(%s)'
+    else:
+        vals = ', '.join([placeholder(dbtype)] * count)
+        where = f'{model.FILE_PATH} in ({vals})'
+    return f'select {model.FILE_PATH} from {table_name} where {where}'
+
+
+def fingerprints_many(dbtype=DUCKDB, count=1):
+    '''
+    Selects the ETag & file size stored for which of `count` file paths
+    are present.
+    '''
+    debug(f'building fingerprints statement for {count} paths')
+    cols = f'{model.FILE_PATH}, {model.ETAG}, {model.FILE_SIZE}'
+    if dbtype == POSTGRESQL:
+        return f'select {cols} from {table_name} where {model.FILE_PATH} = any(%s)'
+    vals = ', '.join([placeholder(dbtype)] * count)
+    return f'select {cols} from {table_name} where {model.FILE_PATH} in ({vals})'
@@ -1,15 +1,36 @@
 from logging import info, debug, warning
 from sys import stdout
 
+from mp.io.writer import POSTGRESQL
 from mp.io.writer.connection_factory import ConnectionFactory
-from mp.io.writer.metadata_sql import insert, exists, update, delete
-from mp.model import FILE_PATH, IMAGE_ID
+from mp.io.writer.formatter import csv_formatter, csv_row
+from mp.io.writer.metadata_sql import (
+    _columns,
+    _update_columns,
+    insert,
+    exists,
+    exists_many,
+    fingerprints_many,
+    update,
+    upsert,
+    upsert_many,
+    delete,
+)
+from mp.model.batch import MetadataBatch
+from mp.util.tools import batches
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BULK_SIZE = 10000
 
 
 class MetadataWriter(object):  # pragma: no cover
     def write(self, metadata):
         pass
 
+    def commit(self):
+        '''Makes what has been written so far durable, without ending the session.'''
+        pass
+
 
 class FilehandleMetadataWriter(MetadataWriter):
     def __init__(self, output, formatter):
@@ -32,11 +53,44 @@ class FilehandleMetadataWriter(MetadataWriter):
         self.output.flush()
         return None
 
+    def commit(self):
+        self.output.flush()
+
+
+class CsvMetadataWriter(FilehandleMetadataWriter):
+    '''
+    Writes metadata as one csv table: the header is written once, before the
+    first row, with the columns of every row following.  Without `header`,
+    e.g. when appending to a table already written, only the rows are.  Rows
+    are flushed to `output` on `commit()` and on exit rather than one at a
+    time.
+    '''
+
+    def __init__(self, output, header=True):
+        FilehandleMetadataWriter.__init__(self, output, csv_formatter)
+        self.header = header
+        self.columns = None
+
+    def write(self, metadata):
+        data = metadata.dict()
+        if self.columns is None:
+            self.columns = sorted(data.keys())
+            if self.header:
+                self.output.write(csv_row(self.columns))
+        self.output.write(csv_row([data.get(c) for c in self.columns]))
+        return None
+
 
 class DatabaseMetadataWriter(MetadataWriter):  # pragma: no cover
-    def __init__(self, connection_factory):
+    def __init__(self, connection_factory, use_upsert=True):
+        '''
+        When `use_upsert` is set rows are written with a single upsert
+        statement, otherwise with an existence check followed by an insert or
+        an update.
+        '''
         self.connection_factory = connection_factory
         self.type = self.connection_factory.dbinfo['dbtype']
+        self.use_upsert = use_upsert
 
     def __enter__(self):
         cf = self.connection_factory
@@ -52,10 +106,17 @@ class DatabaseMetadataWriter(MetadataWriter):  # pragma: no cover
             self.connection.rollback()
         else:
             self.connection.commit()
-        self.connection.close()
-        debug('Database connection closed.')
+        self.connection_factory.release(self.connection)
+        debug('Database connection released.')
+
+    def commit(self):
+        debug('committing.')
+        self.connection.commit()
 
     def write(self, metadata):
+        if self.use_upsert:
+            info(f'upserting file_path {metadata.file_path}.')
+            return self.upsert(metadata)
         if self.exists(metadata.file_path):
             info(f'file_path {metadata.file_path} already exists in db, updating it.')
             return self.update(metadata)
@@ -63,22 +124,74 @@ class DatabaseMetadataWriter(MetadataWriter):  # pragma: no cover
             info(f'inserting new file_path {metadata.file_path}.')
             return self.insert(metadata)
 
+    def write_many(self, metadatas, batch_size=DEFAULT_BATCH_SIZE):
+        '''
+        Upserts `metadatas` with a single statement per batch of `batch_size`
+        rows, and returns the id of each row in the order given.
+        '''
+        ids = []
+        for batch in batches(metadatas, batch_size):
+            # a row may only be upserted once per statement; the last one wins
+            rows = {m.file_path: m for m in batch}
+            params = [v for m in rows.values() for v in self.params(m)]
+            info(f'upserting batch of {len(rows)} rows.')
+            debug('executing "upsert_many"')
+            self.cursor.execute(upsert_many(self.type, len(rows)), params)
+            written = {path: id for id, path in self.cursor.fetchall()}
+            ids.extend([written.get(m.file_path) for m in batch])
+        return ids
+
     def exists(self, path):
         debug('executing "exists"')
-        r = self._exec(exists(self.type), {FILE_PATH: path})
+        r = self._exec(exists(self.type), [path])
         return True if r and r == 1 else False
 
+    def exists_many(self, paths):
+        '''Returns the set of `paths` already present, with one query per batch.'''
+        found = set()
+        for batch in batches(paths, DEFAULT_BATCH_SIZE):
+            params = [batch] if self.type == POSTGRESQL else batch
+            debug('executing "exists_many"')
+            self.cursor.execute(exists_many(self.type, len(batch)), params)
+            found.update([r[0] for r in self.cursor.fetchall()])
+        return found
+
+    def fingerprints(self, paths):
+        '''
+        Returns the ETag & file size stored for each of `paths` already
+        present, keyed by path, with one query per batch.
+        '''
+        found = {}
+        for batch in batches(paths, DEFAULT_BATCH_SIZE):
+            params = [batch] if self.type == POSTGRESQL else batch
+            debug('executing "fingerprints_many"')
+            self.cursor.execute(fingerprints_many(self.type, len(batch)), params)
+            found.update(
+                {path: (etag, size) for path, etag, size in self.cursor.fetchall()}
+            )
+        return found
+
     def insert(self, metadata):
         debug('executing "insert"')
-        return self._exec(insert(self.type), metadata.dict())
+        return self._exec(insert(self.type), self.params(metadata))
+
+    def upsert(self, metadata):
+        debug('executing "upsert"')
+        return self._exec(upsert(self.type), self.params(metadata))
 
     def update(self, metadata):
         debug('executing "update"')
-        return self._exec(update(self.type), metadata.dict())
+        values = dict(zip(_columns, metadata.to_row()))
+        params = [values[c] for c in _update_columns]
+        return self._exec(update(self.type), params + [metadata.file_path])
 
     def delete(self, image_key):
         debug('executing "delete"')
-        return self._exec(delete(self.type), {IMAGE_ID: image_key.image_id()})
+        return self._exec(delete(self.type), [image_key.image_id])
+
+    def params(self, metadata):
+        '''Values of `metadata` in the order of the table's columns.'''
+        return metadata.to_row()
 
     def _exec(self, statement, params):
         debug(f'executing [{statement}] with [{params}]')
@@ -86,3 +199,49 @@ class DatabaseMetadataWriter(MetadataWriter):  # pragma: no cover
         r = self.cursor.fetchone()
         debug(f'statement exec returned: {r}')
         return r[0] if r and len(r) > 0 else None
+
+
+class BulkMetadataWriter(DatabaseMetadataWriter):
+    '''
+    Writes metadata to a database in bulk.  Rows are buffered into a
+    `MetadataBatch` of up to `bulk_size` rows, which subclasses `flush()` to
+    the database in a few statements rather than one per row.  Buffered rows
+    are written on `commit()` and on exit, so are not seen by queries of this
+    writer before then.
+    '''
+
+    def __init__(self, connection_factory, bulk_size=DEFAULT_BULK_SIZE):
+        DatabaseMetadataWriter.__init__(self, connection_factory)
+        self.bulk_size = bulk_size
+        self.batch = MetadataBatch()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_val is None:
+            try:
+                self.flush()
+            except Exception as e:
+                self.end_transaction(type(e), e, e.__traceback__)
+                raise
+        else:
+            self.batch.clear()
+        self.end_transaction(exc_type, exc_val, exc_tb)
+
+    def write(self, metadata):
+        self.batch.append(metadata)
+        if len(self.batch) >= self.bulk_size:
+            self.flush()
+        return None
+
+    def commit(self):
+        self.flush()
+        self.commit_transaction()
+
+    def flush(self):  # pragma: no cover
+        pass
+
+    def commit_transaction(self):
+        DatabaseMetadataWriter.commit(self)
+
+    def end_transaction(self, exc_type, exc_val, exc_tb):
+        '''Commits, or on an exception rolls back, then releases the connection.'''
+        DatabaseMetadataWriter.__exit__(self, exc_type, exc_val, exc_tb)
@@ -0,0 +1,55 @@
+from io import StringIO
+from logging import info, debug
+
+from mp.io.writer import POSTGRESQL
+from mp.io.writer.metadata_sql import (
+    create_staging,
+    copy_to_staging,
+    truncate_staging,
+    staging_table_name,
+    upsert_select,
+)
+from mp.io.writer.metadata_writer import BulkMetadataWriter, DEFAULT_BULK_SIZE
+
+
+class PostgresqlCopyMetadataWriter(BulkMetadataWriter):
+    '''
+    Writes metadata to PostgreSQL in bulk.  Each batch is streamed with
+    `COPY ... FROM STDIN` as CSV into a temporary staging table, then merged
+    into the metadata table with a single upsert.
+    '''
+
+    def __init__(self, connection_factory, bulk_size=DEFAULT_BULK_SIZE):
+        BulkMetadataWriter.__init__(self, connection_factory, bulk_size)
+        if self.type != POSTGRESQL:
+            raise ValueError(f'COPY is not supported by {self.type}')
+
+    def flush(self):
+        if not self.batch:
+            return
+        info(f'copying batch of {len(self.batch)} rows.')
+        self.cursor.execute(create_staging())
+        self.cursor.copy_expert(copy_to_staging(), to_csv(self.batch.rows()))
+        debug('executing "upsert_select"')
+        self.cursor.execute(upsert_select(staging_table_name))
+        self.cursor.execute(truncate_staging())
+        self.batch.clear()
+
+
+def to_csv(rows):
+    '''
+    Encodes `rows` as CSV that COPY reads back as they were: every value is
+    quoted, so that only a missing one is read as null rather than as an
+    empty string.
+    '''
+    data = StringIO()
+    for row in rows:
+        data.write(','.join([csv_field(v) for v in row]) + '\n')
+    data.seek(0)
+    return data
+
+
+def csv_field(value):
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
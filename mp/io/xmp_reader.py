@@ -0,0 +1,44 @@
+from logging import debug, warning
+
+from lxml import etree
+
+MAX_XMP_SIZE = 1024 * 1024
+CHUNK_SIZE = 2 * 1024
+
+RDF_DESCRIPTION = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}Description'
+
+
+def scan_xmp(packet, names, max_size=MAX_XMP_SIZE):
+    '''
+    Returns the values of the XMP properties `names`, given in `{namespace}name`
+    form, that are found in `packet` either as attributes of an
+    `rdf:Description` or as elements holding only text.  The first value of
+    each is kept.  The packet is parsed incrementally, and no further than
+    once all of `names` are found, or than its first `max_size` bytes.
+    '''
+    wanted = set(names)
+    found = {}
+    end = min(len(packet), max_size)
+    # only events for these tags are raised, the rest are skipped by lxml
+    parser = etree.XMLPullParser(
+        events=('start', 'end'),
+        tag=[RDF_DESCRIPTION, *wanted],
+        resolve_entities=False,
+        no_network=True,
+    )
+    for offset in range(0, end, CHUNK_SIZE):
+        parser.feed(bytes(packet[offset : min(offset + CHUNK_SIZE, end)]))
+        for event, element in parser.read_events():
+            if event == 'start':
+                for name in wanted.intersection(element.attrib):
+                    found[name] = element.attrib[name]
+            elif element.tag in wanted and len(element) == 0 and element.text:
+                found[element.tag] = element.text.strip()
+            wanted.difference_update(found)
+            if not wanted:
+                return found
+
+    if len(packet) > max_size:
+        warning(f'XMP packet of {len(packet)} bytes read only to {max_size} bytes.')
+    debug(f'XMP properties not found: {wanted}')
+    return found
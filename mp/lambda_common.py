@@ -1,8 +1,9 @@
+from io import BytesIO
 from json import dumps
 from logging import debug, info, warning, error
 from os import environ
-from tempfile import NamedTemporaryFile
 from traceback import format_tb
+from urllib.parse import parse_qs
 from uuid import uuid4
 
 import sentry_sdk
@@ -13,12 +14,24 @@ from mp import (
     MONITORING_DSN,
     OPERATING_ENV,
     DATABASE_URL,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_IDLE_TIMEOUT,
     FORCE_UPDATE,
+    HARD_UPDATE,
+    WORKER_COUNT,
 )
 from mp.model.image_key import ImageKey
-from mp.io.loader.s3_loader import download_file_from_s3
-from mp.io.metadata_reader import extract_metadata
-from mp.io.writer.connection_factory import ConnectionFactory
+from mp.io.loader.s3_loader import (
+    ObjectInfo,
+    download_fileobj_from_s3,
+    fetch_header_from_s3,
+)
+from mp.io.header_reader import UnsupportedFormatError
+from mp.io.metadata_reader import extract_metadata, extract_metadata_from_header
+from mp.io.writer.connection_factory import (
+    ConnectionFactory,
+    DEFAULT_POOL_IDLE_TIMEOUT,
+)
 from mp.io.writer.metadata_writer import (
     MetadataWriter,
     DatabaseMetadataWriter,
@@ -61,6 +74,33 @@ def check_force_update(event: object) -> bool:
     return True if qs and 'update' in qs else False
 
 
+def check_hard_update(event: object) -> bool:
+    '''
+    A hard update re-extracts metadata even when the stored ETag & size show
+    the image is unchanged. Requested with `FORCE_UPDATE=hard` or `?update=hard`.
+    '''
+    debug('check_hard_update called')
+    if environ.get(FORCE_UPDATE) == HARD_UPDATE:  # pragma: no cover
+        return True
+    if not event:
+        return None
+    qs = event.get('queryStringParameters')
+    if isinstance(qs, dict):
+        return qs.get('update') == HARD_UPDATE
+    return True if qs and HARD_UPDATE in parse_qs(qs).get('update', []) else False
+
+
+def is_unchanged(fingerprint: tuple, object_info: ObjectInfo) -> bool:
+    '''
+    True when the ETag & size stored for an image, as returned by
+    `fingerprints`, match those of its object in S3.
+    '''
+    if not fingerprint or not object_info:
+        return False
+    etag, size = fingerprint
+    return etag is not None and etag == object_info.etag and size == object_info.size
+
+
 def init_monitoring() -> None:  # pragma: no cover
     debug('init_monitoring called')
     dsn = environ.get(MONITORING_DSN)
@@ -82,10 +122,38 @@ def init_monitoring() -> None:  # pragma: no cover
     info(f'Monitoring configured with DSN: {dsn}')
 
 
+DEFAULT_POOL_SIZE = 4
+
+
+def worker_count() -> int:
+    '''Number of records of an S3 event processed concurrently.'''
+    return int(environ.get(WORKER_COUNT, 1))
+
+
+def pool_size() -> int:
+    '''
+    Number of idle connections kept, at least one per worker, as a worker
+    whose connection is not kept would reconnect for every record.
+    '''
+    size = int(environ.get(DATABASE_POOL_SIZE, DEFAULT_POOL_SIZE))
+    workers = worker_count()
+    if size < workers:
+        if DATABASE_POOL_SIZE in environ:
+            warning(
+                f'{DATABASE_POOL_SIZE} of {size} is less than the {workers} workers, '
+                f'keeping {workers} connections.'
+            )
+        size = workers
+    return size
+
+
 def connection_factory():  # pragma: no cover
     u = environ.get(DATABASE_URL)
     url = parse_db_url(u)
-    return ConnectionFactory.instance(url)
+    # connections are pooled in module scope, so survive warm invocations
+    size = pool_size()
+    timeout = float(environ.get(DATABASE_POOL_IDLE_TIMEOUT, DEFAULT_POOL_IDLE_TIMEOUT))
+    return ConnectionFactory.instance(url, pool_size=size, idle_timeout=timeout)
 
 
 def init_exception_writer() -> ExceptionEventWriter:  # pragma: no cover
@@ -100,13 +168,22 @@ def init_metadata_writer() -> MetadataWriter:  # pragma: no cover
     return DatabaseMetadataWriter(conn_factory)
 
 
-def write_metadata(writer: MetadataWriter, key: ImageKey) -> object:  # pragma: no cover
+def write_metadata(
+    writer: MetadataWriter, key: ImageKey, object_info: ObjectInfo = None
+) -> object:  # pragma: no cover
     debug(f'write_metadata called: {writer} for {key}')
-    with NamedTemporaryFile(suffix=f'.{key.extension}') as temp:
-        download_file_from_s3(key, temp.name)
-        metadata = extract_metadata(key, temp.name)
-        debug(metadata)
-        return writer.write(metadata)
+    etag = object_info.etag if object_info else None
+    try:
+        header, size = fetch_header_from_s3(key, object_info=object_info)
+        metadata = extract_metadata_from_header(key, header, size, etag)
+    except UnsupportedFormatError as e:
+        warning(f'Unable to read header of {key} ({e}), downloading it.')
+        with BytesIO() as buffer:
+            size = download_fileobj_from_s3(key, buffer)
+            buffer.seek(0)
+            metadata = extract_metadata(key, buffer, file_size=size, etag=etag)
+    debug(metadata)
+    return writer.write(metadata)
 
 
 def generate_json_response(message, sc=200):
@@ -1,6 +1,8 @@
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
 
 import sentry_sdk
 
@@ -18,11 +20,13 @@ def handler(event, context={}):
     logging.debug(event)
 
     force_update = lambda_common.check_force_update(event)
+    hard_update = lambda_common.check_hard_update(event)
 
     with sentry_sdk.configure_scope() as scope:
         logging.info(f'Scope {scope} configured.')
         scope.set_extra('processor_event', event)
         scope.set_tag('force_update', force_update)
+        scope.set_tag('hard_update', hard_update)
     
         if os.environ.get(TRIGGER_ERROR):
             scope.set_tag(TRIGGER_ERROR, os.environ.get(TRIGGER_ERROR))
@@ -32,10 +36,10 @@ def handler(event, context={}):
 
         logging.info(f'handling event of type {event_type}')
         if event_type == 's3':
-            return s3_handler(event, scope, context, force_update)
+            return s3_handler(event, scope, context, force_update, hard_update)
 
         elif event_type == 'api':
-            return api_handler(event, scope, context, force_update)
+            return api_handler(event, scope, context, force_update, hard_update)
 
         else:
             raise Exception('unrecognized event')
@@ -50,40 +54,83 @@ def get_event_type(event):
         return 's3'
 
 
-def s3_handler(event, scope, context={}, force_update=False):
+def s3_handler(event, scope, context={}, force_update=False, hard_update=False):
     logging.debug('s3_handler called.')
     keys = lambda_common.extract_image_keys_from_s3_event(event)
+    sz = len(keys)
 
     writer = lambda_common.init_metadata_writer()
-    x_cnt = 0
-    for key in keys:
-        try:
-            scope.set_tag('image_key', key.file_path)
-            scope.set_tag('owner_id', key.owner_id)
-            scope.set_tag('image_id', key.image_id)
+    with writer:
+        in_db = writer.fingerprints([key.file_path for key in keys])
+    logging.info(
+        f'{len(in_db)} of {sz} key(s) in db, force: {force_update}, hard: {hard_update}'
+    )
+    if not force_update:
+        keys = [key for key in keys if key.file_path not in in_db]
+    if hard_update:
+        in_db = {}
+
+    workers = lambda_common.worker_count()
+    if workers > 1 and len(keys) > 1:
+        logging.info(f'Processing {len(keys)} record(s) with {workers} workers')
+        # writers hold a connection & cursor, so each thread gets its own
+        thread_state = local()
+
+        def process(key):
+            if not hasattr(thread_state, 'writer'):
+                thread_state.writer = lambda_common.init_metadata_writer()
+            fingerprint = in_db.get(key.file_path)
+            return process_s3_key(thread_state.writer, key, fingerprint)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            failures = list(pool.map(process, keys))
+    else:
+        failures = [
+            process_s3_key(writer, key, in_db.get(key.file_path)) for key in keys
+        ]
+
+    x_cnt = failures.count(True)
+    logging.info(f'OK: Processing of {sz} record(s) completed with {x_cnt} errors')
+
+
+def process_s3_key(writer, key, fingerprint=None):
+    '''
+    Extracts and writes the metadata of a single record of an S3 event,
+    unless `fingerprint`, the ETag & size stored for it, shows the image is
+    unchanged.  Returns True if that failed, after recording the failure.
+    Records may be processed concurrently, so each is tagged in its own scope.
+    '''
+    with sentry_sdk.push_scope() as scope:
+        scope.set_tag('image_key', key.file_path)
+        scope.set_tag('owner_id', key.owner_id)
+        scope.set_tag('image_id', key.image_id)
 
-            if not s3_loader.key_exists(key.file_path):
+        try:
+            object_info = s3_loader.key_exists(key.file_path)
+            if not object_info:
                 bucket = os.environ.get(SOURCE_BUCKET)
                 logging.info(f'NOT FOUND: {key} not found in bucket: {bucket}.')
-                continue
+                return False
+
+            if lambda_common.is_unchanged(fingerprint, object_info):
+                logging.info(
+                    f'UNCHANGED: {key} matches ETag {object_info.etag}, skipping.'
+                )
+                return False
 
             with writer:
-                exists_in_db = writer.exists(key.file_path)
-                logging.info(f'Data in db {exists_in_db}, force: {force_update}')
-                if not exists_in_db or (exists_in_db and force_update):
-                    logging.info(f'Extracting and writing metadata to db for {key}')
-                    result = lambda_common.write_metadata(writer, key)
-                    if result:
-                        logging.info(f'result: {result}')
+                logging.info(f'Extracting and writing metadata to db for {key}')
+                result = lambda_common.write_metadata(writer, key, object_info)
+                if result:
+                    logging.info(f'result: {result}')
+            return False
         except:
-            x_cnt = x_cnt + 1
             x_writer = lambda_common.init_exception_writer()
             lambda_common.write_exception_event(x_writer, key, sys.exc_info())
-    sz = len(keys)
-    logging.info(f'OK: Processing of {sz} record(s) completed with {x_cnt} errors')
+            return True
 
 
-def api_handler(event, scope, context={}, force_update=False):
+def api_handler(event, scope, context={}, force_update=False, hard_update=False):
     logging.info('api_handler called.')
     key = lambda_common.extract_image_key_from_apig_event(event)
     if not key:
@@ -95,16 +142,21 @@ def api_handler(event, scope, context={}, force_update=False):
     scope.set_tag('owner_id', key.owner_id)
     scope.set_tag('image_id', key.image_id)
 
-    if not s3_loader.key_exists(key.file_path):
+    object_info = s3_loader.key_exists(key.file_path)
+    if not object_info:
         logging.info(f'key does not exist {key}')
         return lambda_common.generate_json_response(f'{key} not found.', sc=404)
 
     writer = lambda_common.init_metadata_writer()
     with writer:
-        exists_in_db = writer.exists(key.file_path)
-        if not exists_in_db or (exists_in_db and force_update):
+        fingerprint = writer.fingerprints([key.file_path]).get(key.file_path)
+        exists_in_db = fingerprint is not None
+        unchanged = not hard_update and lambda_common.is_unchanged(
+            fingerprint, object_info
+        )
+        if not exists_in_db or (exists_in_db and force_update and not unchanged):
             logging.info('going to extract and write metadata to db')
-            lambda_common.write_metadata(writer, key)
+            lambda_common.write_metadata(writer, key, object_info)
             return lambda_common.generate_json_response(f'{key} processed.')
         else:
             logging.info('skip writing metadata to db')
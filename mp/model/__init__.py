@@ -3,6 +3,7 @@ OWNER_ID = 'owner_id'
 CREATE_DATE = 'create_date'
 CREATE_DAY_ID = 'create_day_id'
 
+ETAG = 'etag'
 FILE_PATH = 'file_path'
 FILE_SIZE = 'file_size'
 IMAGE_HEIGHT = 'image_height'
@@ -0,0 +1,192 @@
+'''
+A batch of metadata held column by column, rather than as one `Metadata`
+object per image, for writers that buffer many rows before writing them.
+'''
+from array import array
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from mp.model import *
+from mp.model.metadata import COLUMNS
+
+_epoch = datetime(1970, 1, 1)
+_epoch_utc = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_microsecond = timedelta(microseconds=1)
+
+
+class NumericColumn:
+    '''Numbers in a typed `array`, with a validity flag per value for nulls.'''
+
+    def __init__(self, typecode):
+        self.data = array(typecode)
+        self.valid = bytearray()
+        self.nulls = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def append(self, value):
+        if value is None:
+            self.data.append(0)
+            self.valid.append(0)
+            self.nulls += 1
+        else:
+            self.data.append(self.encode(value))
+            self.valid.append(1)
+
+    def set(self, i, value):
+        self.nulls += (value is None) - (not self.valid[i])
+        self.data[i] = 0 if value is None else self.encode(value)
+        self.valid[i] = value is not None
+
+    def get(self, i):
+        return self.decode(self.data[i]) if self.valid[i] else None
+
+    def encode(self, value):
+        return value
+
+    def decode(self, value):
+        return value
+
+
+class TimestampColumn(NumericColumn):
+    '''
+    Datetimes as microseconds since the epoch.  Values of a column `with_tz`
+    are read back in UTC, and naive values written to it are taken as UTC.
+    '''
+
+    def __init__(self, with_tz=False):
+        NumericColumn.__init__(self, 'q')
+        self.with_tz = with_tz
+
+    def encode(self, value):
+        if value.tzinfo is None:
+            return (value - _epoch) // _microsecond
+        return (value - _epoch_utc) // _microsecond
+
+    def decode(self, value):
+        return (_epoch_utc if self.with_tz else _epoch) + value * _microsecond
+
+
+class DictionaryColumn:
+    '''
+    Strings encoded as indexes into the list of distinct `values`, for
+    columns such as camera make & model that repeat a few values many times.
+    A missing value is encoded as `None`, always at index 0.
+    '''
+
+    def __init__(self):
+        self.codes = array('i')
+        self.values = [None]
+        self.index = {None: 0}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def set(self, i, value):
+        self.codes[i] = self.encode(value)
+
+    def get(self, i):
+        return self.values[self.codes[i]]
+
+    def encode(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ObjectColumn:
+    '''
+    Values, such as paths & ids, that are mostly distinct, in a list; ids
+    are kept as strings.
+    '''
+
+    def __init__(self):
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, value):
+        self.values.append(self.encode(value))
+
+    def set(self, i, value):
+        self.values[i] = self.encode(value)
+
+    def get(self, i):
+        return self.values[i]
+
+    def encode(self, value):
+        return str(value) if isinstance(value, UUID) else value
+
+
+def new_column(field):
+    if field in (CREATE_DATE, GPS_DATE_TIME):
+        return TimestampColumn(with_tz=field == GPS_DATE_TIME)
+    if field == FILE_SIZE:
+        return NumericColumn('q')
+    if field in (GPS_LAT, GPS_LON, GPS_ALT):
+        return NumericColumn('d')
+    if field in (
+        CREATE_DAY_ID,
+        IMAGE_WIDTH,
+        IMAGE_HEIGHT,
+        ISO_SPEED,
+        SHUTTER_SPEED_N,
+        SHUTTER_SPEED_D,
+        FOCAL_LENGTH_N,
+        FOCAL_LENGTH_D,
+    ):
+        return NumericColumn('i')
+    if field in (
+        MIME_TYPE,
+        CAMERA_MAKE,
+        CAMERA_MODEL,
+        APERTURE,
+        SHUTTER_SPEED,
+        FOCAL_LENGTH,
+        ARTIST,
+    ):
+        return DictionaryColumn()
+    return ObjectColumn()
+
+
+class MetadataBatch:
+    '''
+    Rows of metadata stored as one typed column per field of `COLUMNS`.
+    Rows are keyed by file path, as in the metadata table: appending
+    metadata for a path already in the batch replaces that row.
+    '''
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def clear(self):
+        # new columns, as arrays may still be referenced by a previous hand-off
+        self.columns = {c: new_column(c) for c in COLUMNS}
+        self.positions = {}
+
+    def append(self, metadata):
+        row = metadata.to_row()
+        i = self.positions.get(metadata.file_path)
+        if i is None:
+            self.positions[metadata.file_path] = len(self.positions)
+            for column, value in zip(self.columns.values(), row):
+                column.append(value)
+        else:
+            for column, value in zip(self.columns.values(), row):
+                column.set(i, value)
+
+    def rows(self):
+        '''Values of each row, in the order of `COLUMNS`.'''
+        columns = list(self.columns.values())
+        for i in range(len(self)):
+            yield [column.get(i) for column in columns]
@@ -29,7 +29,9 @@ class ImageKey:
         (self._owner_id, self._image_id, self._extension) = parse(path)
 
     @classmethod
-    def new(cls, owner_id=uuid4(), image_id=uuid4(), extension='jpg'):
+    def new(cls, owner_id=None, image_id=None, extension='jpg'):
+        owner_id = owner_id if owner_id else uuid4()
+        image_id = image_id if image_id else uuid4()
         path = f'{owner_id}/{image_id}.{extension}'
         return cls(path)
 
@@ -1,133 +1,231 @@
 from logging import debug
+from operator import attrgetter
+from types import ModuleType
 from uuid import uuid4
 from datetime import datetime
 
+from mp import model
 from mp.model import *
-from mp.util.objects import properties, self_properties
+
+# fields of metadata, in the order they are listed by `Metadata.dict()`
+FIELDS = (
+    IMAGE_ID,
+    OWNER_ID,
+    FILE_PATH,
+    FILE_SIZE,
+    ETAG,
+    CREATE_DATE,
+    CREATE_DAY_ID,
+    MIME_TYPE,
+    IMAGE_WIDTH,
+    IMAGE_HEIGHT,
+    CAMERA_MAKE,
+    CAMERA_MODEL,
+    APERTURE,
+    SHUTTER_SPEED_N,
+    SHUTTER_SPEED_D,
+    SHUTTER_SPEED,
+    FOCAL_LENGTH,
+    FOCAL_LENGTH_N,
+    FOCAL_LENGTH_D,
+    ISO_SPEED,
+    GPS_LON,
+    GPS_LAT,
+    GPS_ALT,
+    GPS_DATE_TIME,
+    ARTIST,
+)
+
+# fields of metadata, in the order of the columns of the metadata table
+COLUMNS = tuple(
+    getattr(model, item)
+    for item in sorted(dir(model))
+    if not item.startswith('__') and not isinstance(getattr(model, item), ModuleType)
+)
 
 
 def create_day_id(dt):
     '''converts a datetime object to yyyymmdd:int'''
     if dt:
-        date = dt.strftime('%Y%0m%0d')
-        return int(date)
+        return dt.year * 10000 + dt.month * 100 + dt.day
     return None
 
 
 class Metadata:
     '''
-    https://mnesarco.github.io/blog/2020/07/23/python-metaprogramming-properties-on-steroids
+    Metadata of an image, as read-only fields.  Fields missing from `args`
+    take their default values, and `create_day_id` is derived from
+    `create_date` when one is given.
     '''
 
-    def __init__(self, args):
-        _args = dict(Metadata._defaults, **args)
-        self_properties(self, scope=_args)
-
-    with properties(locals(), 'meta') as meta:
-
-        @meta.prop(read_only=True)
-        def id(self) -> uuid4:
-            '''Required: Primary Key'''
-
-        @meta.prop(read_only=True)
-        def owner_id(self) -> uuid4:
-            '''Required: Account that owns this image'''
-
-        @meta.prop(read_only=True)
-        def file_path(self) -> str:
-            '''Required: Path on the filesystem to this image.'''
-
-        @meta.prop(read_only=True)
-        def file_size(self) -> int:
-            '''Size of the image in bytes.'''
-
-        @meta.prop(read_only=True)
-        def create_date(self) -> datetime:
-            '''Date & time when image was created, without timezone'''
-
-        @meta.prop(read_only=True)
-        def create_day_id(self) -> int:
-            '''Id of the create day.'''
-            if self._create_date:
-                self._create_day_id = create_day_id(self._create_date)
-
-        @meta.prop(read_only=True)
-        def mime_type(self) -> str:
-            '''Mime type of the image.'''
-
-        @meta.prop(read_only=True)
-        def image_width(self) -> int:
-            '''Width of the image'''
-
-        @meta.prop(read_only=True)
-        def image_height(self) -> int:
-            '''Width of the image'''
-
-        @meta.prop(read_only=True)
-        def camera_make(self) -> str:
-            '''Make of the camera that made this image.'''
-
-        @meta.prop(read_only=True)
-        def camera_model(self) -> str:
-            '''Model of the camera that made this image.'''
-
-        @meta.prop(read_only=True)
-        def aperture(self) -> str:
-            '''
-            Actual aperture value of the lens when the image was taken, converted from APEX units.
-            https://photo.stackexchange.com/a/60950/1789
-            '''
-
-        @meta.prop(read_only=True)
-        def shutter_speed_numerator(self) -> int:
-            '''Numerator of the shutter speed.'''
+    __slots__ = tuple('_' + f for f in FIELDS)
 
-        @meta.prop(read_only=True)
-        def shutter_speed_denominator(self) -> int:
-            '''Denominator of the shutter speed.'''
-
-        @meta.prop(read_only=True)
-        def shutter_speed(self) -> str:
-            '''Shutter speed expressed as a fractional value'''
-
-        @meta.prop(read_only=True)
-        def focal_length(self) -> str:
-            '''Focal length used by camera when image created.'''
-
-        @meta.prop(read_only=True)
-        def focal_length_numerator(self) -> int:
-            '''Numerator of the focal length.'''
-
-        @meta.prop(read_only=True)
-        def focal_length_denominator(self) -> int:
-            '''Denominator of the focal length.'''
-
-        @meta.prop(read_only=True)
-        def iso_speed(self) -> int:
-            '''ISO Speed of the image's exposure.'''
-
-        @meta.prop(read_only=True)
-        def gps_lon(self) -> float:
-            '''Longitude of location where image was created.'''
-
-        @meta.prop(read_only=True)
-        def gps_lat(self) -> float:
-            '''Latitude of location where image was created.'''
-
-        @meta.prop(read_only=True)
-        def gps_alt(self) -> float:
-            '''Altitude of location where image was created.'''
-
-        @meta.prop(read_only=True)
-        def gps_date_time(self) -> datetime:
-            '''Date & time (with TZ) at location where image was created.'''
-
-        @meta.prop(read_only=True)
-        def artist(self) -> str:
-            '''Name of the individual who owns this image.'''
+    def __init__(self, args):
+        get = args.get
+        defaults = Metadata._defaults
+        self._id = get(IMAGE_ID)
+        self._owner_id = get(OWNER_ID)
+        self._file_path = get(FILE_PATH)
+        self._file_size = get(FILE_SIZE, defaults[FILE_SIZE])
+        self._etag = get(ETAG, defaults[ETAG])
+        self._create_date = get(CREATE_DATE, defaults[CREATE_DATE])
+        self._create_day_id = (
+            create_day_id(self._create_date)
+            if self._create_date
+            else get(CREATE_DAY_ID, defaults[CREATE_DAY_ID])
+        )
+        self._mime_type = get(MIME_TYPE, defaults[MIME_TYPE])
+        self._image_width = get(IMAGE_WIDTH, defaults[IMAGE_WIDTH])
+        self._image_height = get(IMAGE_HEIGHT, defaults[IMAGE_HEIGHT])
+        self._camera_make = get(CAMERA_MAKE, defaults[CAMERA_MAKE])
+        self._camera_model = get(CAMERA_MODEL, defaults[CAMERA_MODEL])
+        self._aperture = get(APERTURE, defaults[APERTURE])
+        self._shutter_speed_numerator = get(SHUTTER_SPEED_N, defaults[SHUTTER_SPEED_N])
+        self._shutter_speed_denominator = get(
+            SHUTTER_SPEED_D, defaults[SHUTTER_SPEED_D]
+        )
+        self._shutter_speed = get(SHUTTER_SPEED, defaults[SHUTTER_SPEED])
+        self._focal_length = get(FOCAL_LENGTH, defaults[FOCAL_LENGTH])
+        self._focal_length_numerator = get(FOCAL_LENGTH_N, defaults[FOCAL_LENGTH_N])
+        self._focal_length_denominator = get(FOCAL_LENGTH_D, defaults[FOCAL_LENGTH_D])
+        self._iso_speed = get(ISO_SPEED, defaults[ISO_SPEED])
+        self._gps_lon = get(GPS_LON, defaults[GPS_LON])
+        self._gps_lat = get(GPS_LAT, defaults[GPS_LAT])
+        self._gps_alt = get(GPS_ALT, defaults[GPS_ALT])
+        self._gps_date_time = get(GPS_DATE_TIME, defaults[GPS_DATE_TIME])
+        self._artist = get(ARTIST, defaults[ARTIST])
+
+    @property
+    def id(self) -> uuid4:
+        '''Required: Primary Key'''
+        return self._id
+
+    @property
+    def owner_id(self) -> uuid4:
+        '''Required: Account that owns this image'''
+        return self._owner_id
+
+    @property
+    def file_path(self) -> str:
+        '''Required: Path on the filesystem to this image.'''
+        return self._file_path
+
+    @property
+    def file_size(self) -> int:
+        '''Size of the image in bytes.'''
+        return self._file_size
+
+    @property
+    def etag(self) -> str:
+        '''Entity tag of the image's object in S3, when loaded from there.'''
+        return self._etag
+
+    @property
+    def create_date(self) -> datetime:
+        '''Date & time when image was created, without timezone'''
+        return self._create_date
+
+    @property
+    def create_day_id(self) -> int:
+        '''Id of the create day.'''
+        return self._create_day_id
+
+    @property
+    def mime_type(self) -> str:
+        '''Mime type of the image.'''
+        return self._mime_type
+
+    @property
+    def image_width(self) -> int:
+        '''Width of the image'''
+        return self._image_width
+
+    @property
+    def image_height(self) -> int:
+        '''Width of the image'''
+        return self._image_height
+
+    @property
+    def camera_make(self) -> str:
+        '''Make of the camera that made this image.'''
+        return self._camera_make
+
+    @property
+    def camera_model(self) -> str:
+        '''Model of the camera that made this image.'''
+        return self._camera_model
+
+    @property
+    def aperture(self) -> str:
+        '''
+        Actual aperture value of the lens when the image was taken, converted from APEX units.
+        https://photo.stackexchange.com/a/60950/1789
+        '''
+        return self._aperture
+
+    @property
+    def shutter_speed_numerator(self) -> int:
+        '''Numerator of the shutter speed.'''
+        return self._shutter_speed_numerator
+
+    @property
+    def shutter_speed_denominator(self) -> int:
+        '''Denominator of the shutter speed.'''
+        return self._shutter_speed_denominator
+
+    @property
+    def shutter_speed(self) -> str:
+        '''Shutter speed expressed as a fractional value'''
+        return self._shutter_speed
+
+    @property
+    def focal_length(self) -> str:
+        '''Focal length used by camera when image created.'''
+        return self._focal_length
+
+    @property
+    def focal_length_numerator(self) -> int:
+        '''Numerator of the focal length.'''
+        return self._focal_length_numerator
+
+    @property
+    def focal_length_denominator(self) -> int:
+        '''Denominator of the focal length.'''
+        return self._focal_length_denominator
+
+    @property
+    def iso_speed(self) -> int:
+        '''ISO Speed of the image's exposure.'''
+        return self._iso_speed
+
+    @property
+    def gps_lon(self) -> float:
+        '''Longitude of location where image was created.'''
+        return self._gps_lon
+
+    @property
+    def gps_lat(self) -> float:
+        '''Latitude of location where image was created.'''
+        return self._gps_lat
+
+    @property
+    def gps_alt(self) -> float:
+        '''Altitude of location where image was created.'''
+        return self._gps_alt
+
+    @property
+    def gps_date_time(self) -> datetime:
+        '''Date & time (with TZ) at location where image was created.'''
+        return self._gps_date_time
+
+    @property
+    def artist(self) -> str:
+        '''Name of the individual who owns this image.'''
+        return self._artist
 
     _defaults = {
         FILE_SIZE: 0,
+        ETAG: None,
         CREATE_DATE: None,
         CREATE_DAY_ID: 0,
         MIME_TYPE: 'image/jpeg',
@@ -151,10 +249,11 @@ class Metadata:
     }
 
     def dict(self):
-        vals = {}
-        for slot in self.__slots__:
-            vals[slot[1:]] = getattr(self, slot[1:])
-        return vals
+        return dict(zip(FIELDS, _fields(self)))
+
+    def to_row(self):
+        '''Values of this metadata in the order of `COLUMNS`, as parameters of a statement.'''
+        return list(_row(self))
 
     def __eq__(self, other):
         if not isinstance(other, Metadata):
@@ -162,10 +261,12 @@ class Metadata:
             return NotImplemented
         else:
             result = True
-            for slot in self.__slots__:
-                this = getattr(self, slot[1:])
-                that = getattr(other, slot[1:])
+            for field, this, that in zip(FIELDS, _fields(self), _fields(other)):
                 if not this == that:
-                    debug(f'Mismatch on field {slot[1:]}: {this} != {that}')
+                    debug(f'Mismatch on field {field}: {this} != {that}')
                     result = False
             return result
+
+
+_fields = attrgetter(*Metadata.__slots__)
+_row = attrgetter(*['_' + c for c in COLUMNS])
@@ -1,30 +1,78 @@
+import re
 from datetime import datetime
+from functools import lru_cache
+
+DATE_CACHE_SIZE = 1024
+
+date_patterns = [
+    '%Y: %m: %d %H: %M: %S',  # bug in pyexiv2 renders in this format
+    '%Y:%m:%d %H:%M:%S',
+    '%Y:%m:%d %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y.%m.%d %H:%M:%S',
+    '%Y.%m.%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M%z',
+    '%Y-%m-%dT%H:%M',
+    '%Y-%m-%d',
+    '%Y-%m',
+    '%Y%m%d',
+    '%Y',
+]
+
+# regexes matching at least what strptime accepts for each directive
+_directive_regexes = {
+    '%Y': r'\d{4}',
+    '%m': r'\d{1,2}',
+    '%d': r' ?\d{1,2}',
+    '%H': r'\d{1,2}',
+    '%M': r'\d{1,2}',
+    '%S': r'\d{1,2}',
+    '%z': r'(?:z|[+-]\d\d:?\d\d(?::?\d\d(?:\.\d{1,6})?)?)',
+}
+
+
+def pattern_regex(pattern):
+    '''
+    A regex matching every string that `strptime` could parse with
+    `pattern`, and maybe some it can't, e.g. out of range months.
+    '''
+    parts = re.split(r'(%\w|\s+)', pattern)
+    return ''.join(
+        _directive_regexes.get(p) or (r'\s+' if p.isspace() else re.escape(p))
+        for p in parts
+    )
+
+
+_date_regexes = [re.compile(pattern_regex(p), re.IGNORECASE) for p in date_patterns]
+# the first alternative to match names the first pattern that may parse a date
+_date_regex = re.compile(
+    '|'.join([f'(?P<p{i}>{pattern_regex(p)})' for i, p in enumerate(date_patterns)]),
+    re.IGNORECASE,
+)
 
 
 def parse_date(d, tz=None):
-    '''Try a bunch of formats until we succeed in parsing the date, else return None'''
-    date_patterns = [
-        '%Y: %m: %d %H: %M: %S',  # bug in pyexiv2 renders in this format
-        '%Y:%m:%d %H:%M:%S',
-        '%Y:%m:%d %H:%M',
-        '%Y-%m-%d %H:%M:%S',
-        '%Y-%m-%d %H:%M',
-        '%Y.%m.%d %H:%M:%S',
-        '%Y.%m.%d %H:%M',
-        '%Y-%m-%dT%H:%M:%S%z',
-        '%Y-%m-%dT%H:%M:%S',
-        '%Y-%m-%dT%H:%M%z',
-        '%Y-%m-%dT%H:%M',
-        '%Y-%m-%d',
-        '%Y-%m',
-        '%Y%m%d',
-        '%Y',
-    ]
+    '''Parse the date with the first of `date_patterns` that succeeds, else return None'''
     if d:
-        for dp in date_patterns:
+        dt = _parse_date(d)
+        if dt:
+            # when tz is None, force to tz unaware
+            return dt.replace(tzinfo=tz)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date(d):
+    m = _date_regex.fullmatch(d)
+    if not m:
+        return None
+    # only patterns whose regex matches can parse the date; strptime still
+    # decides, so values out of range fall through to the next pattern
+    for i in range(int(m.lastgroup[1:]), len(date_patterns)):
+        if _date_regexes[i].fullmatch(d):
             try:
-                dt = datetime.strptime(d, dp)
-                # when tz is None, force to tz unaware
-                return dt.replace(tzinfo=tz)
+                return datetime.strptime(d, date_patterns[i])
             except ValueError:
                 pass
@@ -0,0 +1,73 @@
+'''
+Stages of the `mp` command: discover → extract → write.  Each stage is a
+generator pulling from the one before it, so an image is written as soon as
+it has been read and no stage holds more than a bounded number of images.
+'''
+from itertools import chain
+from logging import debug
+from time import monotonic
+
+from mp.model.image_key import ImageKey, MIME_TYPES
+
+DEFAULT_COMMIT_ROWS = 500
+DEFAULT_COMMIT_SECONDS = 5.0
+
+
+def discover(image_filenames, image_key=None):
+    '''
+    Pairs each of `image_filenames` with the key it is stored under.  A
+    single image is given `image_key`; when there are more, each is given a
+    new key.
+    '''
+    filenames = iter(image_filenames)
+    first = next(filenames, None)
+    if first is None:
+        return
+    second = next(filenames, None)
+    if second is None:
+        yield (image_key if image_key else new_key(first)), first
+        return
+    for image_filename in chain([first, second], filenames):
+        yield new_key(image_filename), image_filename
+
+
+def new_key(image_filename):
+    '''A new key with the extension of `image_filename`, if that is of an image.'''
+    _, dot, extension = str(image_filename).rpartition('.')
+    extension = extension.lower()
+    return ImageKey.new(
+        extension=extension if dot and extension in MIME_TYPES else 'jpg'
+    )
+
+
+def write(
+    writer,
+    metadatas,
+    commit_rows=DEFAULT_COMMIT_ROWS,
+    commit_seconds=DEFAULT_COMMIT_SECONDS,
+    checkpoint=None,
+):
+    '''
+    Writes each of `metadatas` as it arrives, yielding what the writer
+    returns.  The writer is opened once for the whole run, and committed
+    every `commit_rows` rows or `commit_seconds` seconds, whichever comes
+    first.  A `checkpoint` is committed each time the writer is.
+    '''
+    with writer:
+        pending = 0
+        last_commit = monotonic()
+        for metadata in metadatas:
+            debug(f'writing metadata {metadata.file_path} [{metadata.create_day_id}]')
+            yield writer.write(metadata)
+            if checkpoint:
+                checkpoint.written(metadata.file_path)
+            pending = pending + 1
+            if pending >= commit_rows or monotonic() - last_commit >= commit_seconds:
+                debug(f'committing {pending} rows')
+                writer.commit()
+                if checkpoint:
+                    checkpoint.commit()
+                pending = 0
+                last_commit = monotonic()
+    if checkpoint:
+        checkpoint.commit()
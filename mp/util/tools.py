@@ -1,3 +1,4 @@
+from itertools import islice
 from os import environ
 from logging import getLogger, basicConfig, DEBUG, INFO, debug
 from urllib.parse import urlparse
@@ -12,6 +13,8 @@ class ImageKeyType(click.ParamType):  # pragma: no cover
     name = 'image-key'
 
     def convert(self, value, param, ctx):
+        if isinstance(value, ImageKey):  # the default
+            return value
         try:
             debug(f'parsing image key: {value}')
             return ImageKey(value)
@@ -55,6 +58,15 @@ def parse_db_url(value):
     }
 
 
+def batches(items, size):
+    '''Yields successive lists of up to `size` items from `items`.'''
+    it = iter(items)
+    batch = list(islice(it, size))
+    while batch:
+        yield batch
+        batch = list(islice(it, size))
+
+
 def configure_logging(verbose=False):  # pragma: no cover
     if environ.get(VERBOSE_LOGGING):
         level = DEBUG
@@ -0,0 +1,75 @@
+from os import symlink
+
+from pytest import fixture
+
+from mp.io.loader.file_walker import walk_images, is_image
+
+
+@fixture
+def image_tree(tmp_path):
+    for path in [
+        'b.jpg',
+        'a.JPEG',
+        'notes.txt',
+        'noextension',
+        'card/DCIM/100/IMG_0002.jpg',
+        'card/DCIM/100/IMG_0001.png',
+        'card/DCIM/100/.thumbnails/IMG_0001.jpg',
+        'raw/IMG_0001.cr2',
+    ]:
+        f = tmp_path / path
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_bytes(b'')
+    return tmp_path
+
+
+def relative(root, paths):
+    return [str(p)[len(str(root)) + 1 :] for p in paths]
+
+
+def test_walk_images(image_tree):
+    actual = relative(image_tree, walk_images(str(image_tree)))
+    assert [
+        'a.JPEG',
+        'b.jpg',
+        'card/DCIM/100/IMG_0001.png',
+        'card/DCIM/100/IMG_0002.jpg',
+        'card/DCIM/100/.thumbnails/IMG_0001.jpg',
+    ] == actual
+
+
+def test_walk_images_include(image_tree):
+    actual = relative(image_tree, walk_images(str(image_tree), include=['card/*.jpg']))
+    assert [
+        'card/DCIM/100/IMG_0002.jpg',
+        'card/DCIM/100/.thumbnails/IMG_0001.jpg',
+    ] == actual
+
+
+def test_walk_images_exclude(image_tree):
+    actual = relative(
+        image_tree, walk_images(str(image_tree), exclude=['.thumbnails', '*.png'])
+    )
+    assert ['a.JPEG', 'b.jpg', 'card/DCIM/100/IMG_0002.jpg'] == actual
+
+
+def test_walk_images_lazy(image_tree):
+    images = walk_images(str(image_tree))
+    assert str(image_tree / 'a.JPEG') == next(images)
+
+
+def test_walk_images_symlinked_directory(image_tree):
+    symlink(image_tree / 'card', image_tree / 'card' / 'loop')
+    actual = relative(image_tree, walk_images(str(image_tree / 'card')))
+    assert 3 == len(actual)
+
+
+def test_walk_images_missing(tmp_path):
+    assert [] == list(walk_images(str(tmp_path / 'missing')))
+
+
+def test_is_image():
+    assert is_image('a.jpg')
+    assert is_image('a.PNG')
+    assert not is_image('a.txt')
+    assert not is_image('jpg')
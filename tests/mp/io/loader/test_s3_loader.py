@@ -1,50 +1,107 @@
 import os
+from io import BytesIO
+from os.path import dirname
 from unittest.mock import MagicMock
 
 import boto3
-from pytest import raises
-
-from mp import SOURCE_BUCKET
+from botocore.exceptions import ClientError
+from pytest import raises, fixture
+
+from mp import (
+    SOURCE_BUCKET,
+    HEADER_FETCH_SIZE,
+    S3_MAX_POOL_CONNECTIONS,
+    S3_MAX_ATTEMPTS,
+)
 from mp.io.loader import s3_loader
 from mp.model.image_key import ImageKey
 from tests.mp import mock_event_keys
 
 MOCK_REGION_NAME = 'mock_region_name'
 MOCK_BUCKET_NAME = 'mock_bucket_name'
+TEST_IMAGE = f'{dirname(dirname(__file__))}/img/testExtractMetadata/20190224T205115.jpg'
+
+
+@fixture(autouse=True)
+def clear_s3_clients():
+    s3_loader._clients.clear()
+    yield
+    s3_loader._clients.clear()
 
 
 def test_key_exists_true(mocker):
-    setup_key_exists(mocker, ret_val={'ResponseMetadata': {'HTTPStatusCode': 200}})
-    assert s3_loader.key_exists(mock_event_keys[0])
+    head = {
+        'ContentLength': 3954388,
+        'ETag': '"d41d8cd98f00b204e9800998ecf8427e"',
+        'LastModified': 'mock_last_modified',
+        'ContentType': 'image/jpeg',
+    }
+    setup_key_exists(mocker, ret_val=head)
+    actual = s3_loader.key_exists(mock_event_keys[0])
+    assert actual
+    assert mock_event_keys[0] == actual.key
+    assert 3954388 == actual.size
+    assert '"d41d8cd98f00b204e9800998ecf8427e"' == actual.etag
+    assert 'mock_last_modified' == actual.last_modified
+    assert 'image/jpeg' == actual.content_type
 
 
 def test_key_exists_false(mocker):
-    setup_key_exists(mocker, ret_val={'ResponseMetadata': {'HTTPStatusCode': 404}})
-    assert not s3_loader.key_exists('/aaa/bbb/ccc')
+    s3_lister = setup_key_exists(mocker)
+    error = {'Error': {'Code': '404'}}
+    s3_lister.head_object.side_effect = ClientError(error, 'HeadObject')
+    assert s3_loader.key_exists('/aaa/bbb/ccc') is None
+
+
+def test_key_exists_error(mocker):
+    s3_lister = setup_key_exists(mocker)
+    error = {'Error': {'Code': '403'}}
+    s3_lister.head_object.side_effect = ClientError(error, 'HeadObject')
+    with raises(ClientError):
+        s3_loader.key_exists(mock_event_keys[0])
 
 
 def test_key_exists_diff_region(mocker):
-    not_found = {'ResponseMetadata': {'HTTPStatusCode': 404}}
-    s3_lister = setup_key_exists(mocker, ret_val=not_found)
-    assert not s3_loader.key_exists(mock_event_keys[0], region=MOCK_REGION_NAME)
-    boto3.client.assert_called_with('s3', region_name=MOCK_REGION_NAME)
-    s3_lister.list_objects_v2.assert_called_with(
-        Bucket=MOCK_BUCKET_NAME, MaxKeys=1, Prefix=mock_event_keys[0]
+    s3_lister = setup_key_exists(mocker)
+    assert s3_loader.key_exists(mock_event_keys[0], region=MOCK_REGION_NAME)
+    args, kwargs = boto3.client.call_args
+    assert ('s3',) == args
+    assert MOCK_REGION_NAME == kwargs['region_name']
+    s3_lister.head_object.assert_called_with(
+        Bucket=MOCK_BUCKET_NAME, Key=mock_event_keys[0]
+    )
+
+
+def test_s3_client_cached(mocker):
+    mocker.patch.object(
+        boto3, 'client', MagicMock(side_effect=lambda *a, **k: MagicMock())
     )
+    first = s3_loader.s3_client()
+    assert first is s3_loader.s3_client()
+    assert first is not s3_loader.s3_client(region=MOCK_REGION_NAME)
+    assert 2 == boto3.client.call_count
+
+
+def test_s3_client_config(mocker):
+    setup_key_exists(mocker)
+    mocker.patch.dict(os.environ, {S3_MAX_POOL_CONNECTIONS: '7', S3_MAX_ATTEMPTS: '2'})
+    s3_loader.s3_client()
+    config = boto3.client.call_args[1]['config']
+    assert 7 == config.max_pool_connections
+    assert 2 == config.retries['max_attempts']
 
 
 def test_download_file_from_s3_normal_case(mocker):
-    s3_object, s3_getter = setup_download_file_from_s3(mocker)
+    s3_getter = setup_download_file_from_s3(mocker)
     key = ImageKey.new()
     dest = 'mock_dest'
     s3_loader.download_file_from_s3(key, dest)
-    boto3.resource.assert_called_once()
-    s3_object.Object.assert_called_with(MOCK_BUCKET_NAME, key.file_path)
-    s3_getter.download_file.assert_called_with(dest)
+    boto3.client.assert_called_once()
+    s3_getter.download_file.assert_called_with(MOCK_BUCKET_NAME, key.file_path, dest)
 
 
 def test_download_file_from_s3_not_found(mocker):
-    s3_object, s3_getter = setup_download_file_from_s3(mocker)
+    s3_getter = setup_download_file_from_s3(mocker)
     exception = Exception()
     exception.response = {'Error': {'Code': '404'}}
     s3_getter.download_file.side_effect = exception
@@ -53,24 +110,109 @@ def test_download_file_from_s3_not_found(mocker):
     dest = 'mock_dest'
     with raises(s3_loader.KeyDownloadError):
         s3_loader.download_file_from_s3(key, dest)
-    boto3.resource.assert_called_once()
-    s3_object.Object.assert_called_with(MOCK_BUCKET_NAME, key.file_path)
-    s3_getter.download_file.assert_called_with(dest)
+    boto3.client.assert_called_once()
+    s3_getter.download_file.assert_called_with(MOCK_BUCKET_NAME, key.file_path, dest)
 
 
 def setup_key_exists(mocker, ret_val={}):
     mocker.patch.dict(os.environ, {SOURCE_BUCKET: MOCK_BUCKET_NAME})
     s3_lister = MagicMock()
-    s3_lister.list_objects_v2 = MagicMock(return_value=ret_val)
+    s3_lister.head_object = MagicMock(return_value=ret_val)
     mocker.patch.object(boto3, 'client', MagicMock(return_value=s3_lister))
     return s3_lister
 
 
 def setup_download_file_from_s3(mocker):
     mocker.patch.dict(os.environ, {SOURCE_BUCKET: MOCK_BUCKET_NAME})
-    s3_object = MagicMock()
     s3_getter = MagicMock()
-    s3_object.Object = MagicMock(return_value=s3_getter)
     s3_getter.download_file = MagicMock()
-    mocker.patch.object(boto3, 'resource', MagicMock(return_value=s3_object))
-    return s3_object, s3_getter
+    mocker.patch.object(boto3, 'client', MagicMock(return_value=s3_getter))
+    return s3_getter
+
+
+def test_download_fileobj_from_s3(mocker):
+    data = read_test_image()
+    s3_getter = setup_fetch_header_from_s3(mocker, data)
+    s3_getter.get_object = MagicMock(
+        return_value={'ContentLength': len(data), 'Body': BytesIO(data)}
+    )
+    key = ImageKey.new()
+    buffer = BytesIO()
+    actual = s3_loader.download_fileobj_from_s3(key, buffer)
+    assert len(data) == actual
+    assert data == buffer.getvalue()
+    s3_getter.get_object.assert_called_with(Bucket=MOCK_BUCKET_NAME, Key=key.file_path)
+
+
+def test_download_fileobj_from_s3_not_found(mocker):
+    s3_getter = setup_fetch_header_from_s3(mocker, b'')
+    error = {'Error': {'Code': 'NoSuchKey'}}
+    s3_getter.get_object = MagicMock(side_effect=ClientError(error, 'GetObject'))
+    with raises(s3_loader.KeyDownloadError):
+        s3_loader.download_fileobj_from_s3(ImageKey.new(), BytesIO())
+
+
+def test_fetch_header_from_s3(mocker):
+    data = read_test_image()
+    s3_getter = setup_fetch_header_from_s3(mocker, data)
+    key = ImageKey.new()
+    header, size = s3_loader.fetch_header_from_s3(key, fetch_size=32 * 1024)
+    assert (4032, 3024) == header.size
+    assert len(data) == size
+    first = s3_getter.get_object.call_args_list[0]
+    assert first[1] == {
+        'Bucket': MOCK_BUCKET_NAME,
+        'Key': key.file_path,
+        'Range': 'bytes=0-32767',
+    }
+
+
+def test_fetch_header_from_s3_grows_range(mocker):
+    data = read_test_image()
+    s3_getter = setup_fetch_header_from_s3(mocker, data)
+    mocker.patch.dict(os.environ, {HEADER_FETCH_SIZE: '16'})
+    header, size = s3_loader.fetch_header_from_s3(ImageKey.new())
+    assert (4032, 3024) == header.size
+    ranges = [c[1]['Range'] for c in s3_getter.get_object.call_args_list]
+    assert len(ranges) > 1
+    assert 'bytes=0-15' == ranges[0]
+    assert ranges[1].startswith('bytes=16-')
+
+
+def test_fetch_header_from_s3_known_size(mocker):
+    data = read_test_image()[:40000]
+    s3_getter = setup_fetch_header_from_s3(mocker, data)
+    object_info = s3_loader.ObjectInfo('key', len(data), None, None, None)
+    s3_loader.fetch_header_from_s3(ImageKey.new(), object_info=object_info)
+    ranges = [c[1]['Range'] for c in s3_getter.get_object.call_args_list]
+    assert ['bytes=0-39999'] == ranges
+
+
+def test_fetch_header_from_s3_not_found(mocker):
+    s3_getter = setup_fetch_header_from_s3(mocker, b'')
+    error = {'Error': {'Code': 'NoSuchKey'}}
+    s3_getter.get_object.side_effect = ClientError(error, 'GetObject')
+    with raises(s3_loader.KeyDownloadError):
+        s3_loader.fetch_header_from_s3(ImageKey.new())
+
+
+def read_test_image():
+    with open(TEST_IMAGE, 'rb') as f:
+        return f.read()
+
+
+def setup_fetch_header_from_s3(mocker, data):
+    mocker.patch.dict(os.environ, {SOURCE_BUCKET: MOCK_BUCKET_NAME})
+
+    def get_object(Bucket, Key, Range):
+        start, end = map(int, Range[len('bytes=') :].split('-'))
+        body = data[start : end + 1]
+        return {
+            'ContentRange': f'bytes {start}-{start + len(body) - 1}/{len(data)}',
+            'Body': BytesIO(body),
+        }
+
+    s3_getter = MagicMock()
+    s3_getter.get_object = MagicMock(side_effect=get_object)
+    mocker.patch.object(boto3, 'client', MagicMock(return_value=s3_getter))
+    return s3_getter
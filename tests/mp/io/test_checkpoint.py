@@ -0,0 +1,109 @@
+from os import utime
+
+from pytest import fixture
+
+from mp import pipeline
+from mp.io.checkpoint import Checkpoint
+from mp.model.image_key import ImageKey
+from mp.io.writer.metadata_writer import CsvMetadataWriter
+from tests.mp.model.mock_metadata import MockMetadata
+from tests.mp.io.writer.mock_metadata_writer import MockDatabaseMetadataWriter
+
+
+@fixture
+def image_files(tmp_path):
+    files = []
+    for name in ['a.jpg', 'b.jpg', 'c.jpg']:
+        f = tmp_path / name
+        f.write_bytes(b'0123456789')
+        files.append(str(f))
+    return files
+
+
+def run(checkpoint_file, image_files, fail_after=None, output=None, commit_rows=1):
+    '''
+    Writes `image_files` through a checkpoint, failing after `fail_after`
+    are written.  With `output`, they are appended to that csv file.
+    '''
+    read = []
+
+    def metadatas(images):
+        for image_key, filename in images:
+            if fail_after is not None and len(read) == fail_after:
+                raise ValueError('Boom!')
+            read.append(filename)
+            yield MockMetadata({'file_path': image_key.file_path, 'name': filename})
+
+    with Checkpoint(checkpoint_file, output) as checkpoint:
+        if output:
+            f = open(output, 'a')
+            writer = CsvMetadataWriter(f, header=f.tell() == 0)
+        else:
+            writer = MockDatabaseMetadataWriter()
+        images = checkpoint.skip_completed((ImageKey.new(), f) for f in image_files)
+        try:
+            list(
+                pipeline.write(
+                    writer,
+                    metadatas(images),
+                    commit_rows=commit_rows,
+                    checkpoint=checkpoint,
+                )
+            )
+        except ValueError:
+            pass
+    return read
+
+
+def test_checkpoint_resume(tmp_path, image_files):
+    checkpoint_file = str(tmp_path / 'checkpoint.db')
+    assert image_files[:2] == run(checkpoint_file, image_files, fail_after=2)
+    assert image_files[2:] == run(checkpoint_file, image_files)
+    assert [] == run(checkpoint_file, image_files)
+
+
+def test_checkpoint_resume_output(tmp_path, image_files):
+    checkpoint_file = str(tmp_path / 'checkpoint.db')
+    output = str(tmp_path / 'out.csv')
+    image_files.append(str(tmp_path / 'd.jpg'))
+    open(image_files[-1], 'wb').close()
+
+    # three rows reach the output, but only the first two are committed
+    run(checkpoint_file, image_files, fail_after=3, output=output, commit_rows=2)
+    with open(output) as f:
+        assert 4 == len(f.readlines())
+
+    assert image_files[2:] == run(checkpoint_file, image_files, output=output)
+    with open(output) as f:
+        header, *rows = f.read().splitlines()
+    assert 'file_path,name' == header
+    assert image_files == [row.split(',')[1] for row in rows]
+
+
+def test_checkpoint_changed_file(tmp_path, image_files):
+    checkpoint_file = str(tmp_path / 'checkpoint.db')
+    run(checkpoint_file, image_files)
+    with open(image_files[0], 'ab') as f:
+        f.write(b'more')
+    utime(image_files[1], ns=(0, 0))
+    assert image_files[:2] == run(checkpoint_file, image_files)
+
+
+def test_checkpoint_uncommitted(tmp_path, image_files):
+    checkpoint_file = str(tmp_path / 'checkpoint.db')
+    with Checkpoint(checkpoint_file) as checkpoint:
+        image_key = ImageKey.new()
+        list(checkpoint.skip_completed([(image_key, image_files[0])]))
+        checkpoint.written(image_key.file_path)
+    # not committed, as the writer might not have committed it either
+    assert image_files == run(checkpoint_file, image_files)
+
+
+def test_checkpoint_unreadable(tmp_path):
+    image_key = ImageKey.new()
+    with Checkpoint(str(tmp_path / 'checkpoint.db')) as checkpoint:
+        actual = list(
+            checkpoint.skip_completed([(image_key, str(tmp_path / 'missing.jpg'))])
+        )
+        assert [(image_key, str(tmp_path / 'missing.jpg'))] == actual
+        assert {} == checkpoint.pending
@@ -0,0 +1,164 @@
+from io import BytesIO
+from os.path import dirname
+from struct import pack
+from zlib import compress, crc32
+
+from pytest import raises
+
+from mp.io.header_reader import (
+    HeaderTruncatedError,
+    UnsupportedFormatError,
+    JPEG_SIGNATURE,
+    PNG_SIGNATURE,
+    read_header,
+    read_header_from_file,
+    read_header_incrementally,
+)
+from mp.io.exif_parser import IFD_TAGS, Rational, parse_exif, read_ifd
+from mp.io.metadata_tags import *
+
+CURRENT_DIR = dirname(__file__)
+EXIF_IMAGE = f'{CURRENT_DIR}/img/testExtractMetadata/20190224T205115.jpg'
+XMP_IMAGE = f'{CURRENT_DIR}/img/testExtractMetadata_CreateDateFromXmp/9d90b8f3-113d-4476-afe8-9fc0ac265850.jpg'
+
+
+def png_chunk(chunk_type, data):
+    crc = crc32(chunk_type + data)
+    return pack('>L', len(data)) + chunk_type + data + pack('>L', crc)
+
+
+def png_image(*chunks):
+    ihdr = png_chunk(b'IHDR', pack('>LLBBBBB', 640, 480, 8, 2, 0, 0, 0))
+    idat = png_chunk(b'IDAT', compress(b'\x00' * 16))
+    return PNG_SIGNATURE + ihdr + b''.join(chunks) + idat + png_chunk(b'IEND', b'')
+
+
+def test_read_header_jpeg_exif():
+    actual = read_header_from_file(EXIF_IMAGE)
+    assert (4032, 3024) == actual.size
+    assert actual.exif.startswith(b'II*\x00')
+    assert [] == actual.xmp
+
+
+def test_read_header_jpeg_xmp():
+    actual = read_header_from_file(XMP_IMAGE)
+    assert (1000, 800) == actual.size
+    assert actual.exif is None
+    assert 1 == len(actual.xmp)
+    assert b'xmp:CreateDate' in actual.xmp[0]
+
+
+def test_read_header_truncated():
+    with open(EXIF_IMAGE, 'rb') as f:
+        data = f.read(1024)
+    with raises(HeaderTruncatedError) as e:
+        read_header(data)
+    assert e.value.needed > len(data)
+
+
+def test_read_header_incrementally():
+    with open(EXIF_IMAGE, 'rb') as f:
+        stream = BytesIO(f.read())
+    reads = []
+
+    def read(n):
+        reads.append(n)
+        return stream.read(n)
+
+    actual = read_header_incrementally(read, chunk_size=16)
+    assert (4032, 3024) == actual.size
+    assert len(reads) > 1
+    assert stream.tell() < len(stream.getvalue())
+
+
+def test_read_header_incrementally_past_end():
+    with open(EXIF_IMAGE, 'rb') as f:
+        stream = BytesIO(f.read(1024))
+    with raises(HeaderTruncatedError):
+        read_header_incrementally(stream.read, chunk_size=16)
+
+
+def test_read_header_unsupported():
+    with raises(UnsupportedFormatError):
+        read_header(b'GIF89a' + b'\x00' * 32)
+
+
+def test_read_header_jpeg_truncated_frame_header():
+    sof = b'\xff\xc0' + pack('>H', 5) + b'\x08\x00\x10'
+    with raises(UnsupportedFormatError):
+        read_header(JPEG_SIGNATURE + sof + b'\xff\xda\x00\x02')
+
+
+def test_read_header_jpeg_invalid_segment_length():
+    with raises(UnsupportedFormatError):
+        read_header(JPEG_SIGNATURE + b'\xff\xe1\x00\x01' + b'\x00' * 8)
+
+
+def test_read_header_png_truncated_ihdr():
+    idat = png_chunk(b'IDAT', b'')
+    with raises(UnsupportedFormatError):
+        read_header(PNG_SIGNATURE + png_chunk(b'IHDR', b'\x00' * 4) + idat)
+
+
+def test_read_header_png():
+    xmp = b'<x:xmpmeta xmlns:x="adobe:ns:meta/"/>'
+    itxt = b'XML:com.adobe.xmp\x00\x00\x00\x00\x00' + xmp
+    exif = b'MM\x00*\x00\x00\x00\x08\x00\x00'
+    actual = read_header(png_image(png_chunk(b'eXIf', exif), png_chunk(b'iTXt', itxt)))
+    assert (640, 480) == actual.size
+    assert exif == actual.exif
+    assert [xmp] == actual.xmp
+
+
+def test_read_header_png_compressed_xmp():
+    xmp = b'<x:xmpmeta xmlns:x="adobe:ns:meta/"/>'
+    itxt = b'XML:com.adobe.xmp\x00\x01\x00en\x00\x00' + compress(xmp)
+    actual = read_header(png_image(png_chunk(b'iTXt', itxt)))
+    assert [xmp] == actual.xmp
+
+
+def test_parse_exif():
+    header = read_header_from_file(EXIF_IMAGE)
+    actual = parse_exif(header.exif)
+    assert 'Google' == actual[TAG_IMAGE_MAKE]
+    assert 'Pixel 3' == actual[TAG_IMAGE_MODEL]
+    assert 1514 == actual[TAG_PHOTO_ISOSPEEDRATINGS]
+    assert '2019:02:24 20:51:15' == actual[TAG_PHOTO_DATETIMEORIGINAL]
+    fl = actual[TAG_PHOTO_FOCALLENGTH]
+    assert (4440, 1000) == (fl.numerator, fl.denominator)
+    assert 'N' == actual[TAG_GPSINFO][TAG_GPSINFO_GPSLATITUDEREF]
+    assert 3 == len(actual[TAG_GPSINFO][TAG_GPSINFO_GPSLATITUDE])
+
+
+def test_parse_exif_only_planned_tags():
+    header = read_header_from_file(EXIF_IMAGE)
+    actual = parse_exif(header.exif)
+    assert set(actual) - {TAG_GPSINFO} <= set(TAG_IDS.values())
+    assert set(actual[TAG_GPSINFO]) <= set(GPS_TAG_IDS)
+
+
+def test_read_ifd_skips_tags():
+    # an IFD of a maker note & an ISO speed, both stored in the entry itself
+    maker_note = pack('<HHL4s', 0x927C, 7, 4, b'blob')
+    iso_speed = pack('<HHLH2x', 0x8827, 3, 1, 100)
+    ifd = pack('<H', 2) + maker_note + iso_speed
+    assert {0x8827: 100} == read_ifd(ifd, '<', 0, IFD_TAGS[TAG_EXIF_IFD_POINTER])
+    assert {} == read_ifd(ifd, '<', 0, frozenset())
+
+
+def test_parse_exif_truncated_entry():
+    # IFD0 holding one ascii entry, cut off before its value's offset
+    data = b'II*\x00' + pack('<LH', 8, 1) + pack('<HHL', 0x010F, 2, 10)
+    assert {} == parse_exif(data)
+
+
+def test_parse_exif_empty():
+    assert {} == parse_exif(None)
+    assert {} == parse_exif(b'XX\x00\x00')
+
+
+def test_rational():
+    r = Rational(391, 100)
+    assert 3.91 == r
+    assert (391, 100) == (r.numerator, r.denominator)
+    assert Rational(1, 0) != Rational(1, 0)
@@ -1,3 +1,4 @@
+from io import BytesIO
 from os.path import dirname
 from datetime import datetime, timezone
 
@@ -17,7 +18,9 @@ from mp.io.metadata_reader import (
     extract_gps_degrees,
     extract_gps_time,
     extract_metadata,
+    extract_metadata_many,
     extract_shutter_speed,
+    PENDING_PER_JOB,
 )
 from mp.model import *
 from mp.io.metadata_tags import *
@@ -91,6 +94,101 @@ def test_extract_metadata_CreateDateFromXmp():
     assert expected == actual.create_date.isoformat()
 
 
+def test_extract_metadata_header_only():
+    image_slug = (
+        '2d249780-7fe9-4c49-aa31-0a30d56afa0f/13e16670-7010-11e9-b5c4-320017981ea0.jpg'
+    )
+    image_file = f'{CURRENT_DIR}/img/testExtractMetadata/20190224T205115.jpg'
+    image_key = ImageKey(image_slug)
+    expected = extract_metadata(image_key, image_file)
+    actual = extract_metadata(image_key, image_file, header_only=True)
+    assert expected == actual
+
+
+def test_extract_metadata_header_only_CreateDateFromXmp():
+    image_slug = (
+        '57f738b8-700f-11e9-90ab-320017981ea0/9d90b8f3-113d-4476-afe8-9fc0ac265850.jpg'
+    )
+    image_file = f'{CURRENT_DIR}/img/testExtractMetadata_CreateDateFromXmp/9d90b8f3-113d-4476-afe8-9fc0ac265850.jpg'
+    image_key = ImageKey(image_slug)
+    expected = '2016-02-22T20:57:08'
+    actual = extract_metadata(image_key, image_file, header_only=True)
+    assert expected == actual.create_date.isoformat()
+    assert (1000, 800) == (actual.image_width, actual.image_height)
+
+
+def test_extract_metadata_from_memory():
+    image_slug = (
+        '2d249780-7fe9-4c49-aa31-0a30d56afa0f/13e16670-7010-11e9-b5c4-320017981ea0.jpg'
+    )
+    image_file = f'{CURRENT_DIR}/img/testExtractMetadata/20190224T205115.jpg'
+    image_key = ImageKey(image_slug)
+    expected = extract_metadata(image_key, image_file)
+    with open(image_file, 'rb') as f:
+        data = f.read()
+    for header_only in [False, True]:
+        for source in [data, memoryview(data), BytesIO(data)]:
+            actual = extract_metadata(image_key, source, header_only=header_only)
+            assert expected == actual
+
+
+def test_extract_metadata_explicit_size():
+    image_slug = (
+        '57f738b8-700f-11e9-90ab-320017981ea0/9d90b8f3-113d-4476-afe8-9fc0ac265850.jpg'
+    )
+    image_file = f'{CURRENT_DIR}/img/testExtractMetadata_CreateDateFromXmp/9d90b8f3-113d-4476-afe8-9fc0ac265850.jpg'
+    image_key = ImageKey(image_slug)
+    with open(image_file, 'rb') as f:
+        actual = extract_metadata(image_key, f, header_only=True, file_size=1234)
+    assert 1234 == actual.file_size
+
+
+def test_extract_metadata_many():
+    image_files = [
+        f'{CURRENT_DIR}/img/testExtractMetadata/20190224T205115.jpg',
+        f'{CURRENT_DIR}/img/testExtractMetadata_CreateDateFromXmp/9d90b8f3-113d-4476-afe8-9fc0ac265850.jpg',
+    ] * 5
+    images = [(ImageKey.new(), f) for f in image_files]
+    expected = [extract_metadata(k, f) for k, f in images]
+
+    assert expected == list(extract_metadata_many(images))
+    assert expected == list(extract_metadata_many(images, jobs=2, ordered=True))
+
+    actual = list(extract_metadata_many(iter(images), jobs=2))
+    assert len(expected) == len(actual)
+    for md in expected:
+        assert md in actual
+
+
+def test_extract_metadata_many_fail():
+    image_file = f'{CURRENT_DIR}/img/testExtractMetadata/20190224T205115.jpg'
+    images = [
+        (ImageKey.new(), image_file),
+        (ImageKey.new(), f'{CURRENT_DIR}/missing.jpg'),
+    ]
+    with raises(FileNotFoundError):
+        list(extract_metadata_many(images, jobs=2, ordered=True))
+
+
+def test_extract_metadata_many_lazy():
+    image_file = f'{CURRENT_DIR}/img/testExtractMetadata/20190224T205115.jpg'
+    consumed = []
+
+    def images():
+        for i in range(20):
+            consumed.append(i)
+            yield ImageKey.new(), image_file
+
+    next(extract_metadata_many(images()))
+    assert 1 == len(consumed)
+
+    metadatas = extract_metadata_many(images(), jobs=2)
+    consumed.clear()
+    next(metadatas)
+    assert len(consumed) <= 2 * PENDING_PER_JOB
+    metadatas.close()
+
+
 def test_extract_gps_coords():
     md = {
         TAG_GPSINFO: {
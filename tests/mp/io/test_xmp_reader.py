@@ -0,0 +1,80 @@
+from lxml.etree import XMLSyntaxError
+from pytest import raises
+
+from mp.io.header_reader import read_header_from_file
+from mp.io.metadata_tags import XMP_CREATEDATE, XMP_NS
+from mp.io.xmp_reader import CHUNK_SIZE, scan_xmp
+from tests.mp.io.test_header_reader import XMP_IMAGE
+
+XMP_MODIFYDATE = f'{{{XMP_NS}}}ModifyDate'
+
+
+DESCRIPTION = (
+    b'<rdf:Description rdf:about="" xmlns:xmp="http://ns.adobe.com/xap/1.0/"%s'
+)
+
+
+def xmp_packet(*descriptions):
+    return (
+        b'<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+        b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        + b''.join(DESCRIPTION % d + b'</rdf:Description>' for d in descriptions)
+        + b'</rdf:RDF></x:xmpmeta>'
+    )
+
+
+def test_scan_xmp_image():
+    packet = read_header_from_file(XMP_IMAGE).xmp[0]
+    actual = scan_xmp(packet, [XMP_CREATEDATE])
+    assert {XMP_CREATEDATE: '2016-02-22T20:57:08+01:00'} == actual
+
+
+def test_scan_xmp_attribute():
+    packet = xmp_packet(b' xmp:CreateDate="2020-01-02T03:04:05">')
+    assert {XMP_CREATEDATE: '2020-01-02T03:04:05'} == scan_xmp(packet, [XMP_CREATEDATE])
+
+
+def test_scan_xmp_element():
+    packet = xmp_packet(b'><xmp:CreateDate> 2020-01-02T03:04:05 </xmp:CreateDate>')
+    assert {XMP_CREATEDATE: '2020-01-02T03:04:05'} == scan_xmp(packet, [XMP_CREATEDATE])
+
+
+def test_scan_xmp_first_value():
+    packet = xmp_packet(
+        b' xmp:CreateDate="2020-01-02T03:04:05">',
+        b'><xmp:CreateDate>2021-01-01</xmp:CreateDate>',
+    )
+    assert {XMP_CREATEDATE: '2020-01-02T03:04:05'} == scan_xmp(packet, [XMP_CREATEDATE])
+
+
+def test_scan_xmp_many_names():
+    packet = xmp_packet(
+        b' xmp:ModifyDate="2021-01-01">',
+        b'><xmp:CreateDate>2020-01-02</xmp:CreateDate>',
+    )
+    expected = {XMP_CREATEDATE: '2020-01-02', XMP_MODIFYDATE: '2021-01-01'}
+    assert expected == scan_xmp(packet, [XMP_CREATEDATE, XMP_MODIFYDATE])
+
+
+def test_scan_xmp_missing():
+    packet = xmp_packet(b'><xmp:CreateDate><rdf:Alt/></xmp:CreateDate>')
+    assert {} == scan_xmp(packet, [XMP_CREATEDATE])
+
+
+def test_scan_xmp_max_size():
+    padding = b'><xmp:Label>' + b'x' * 4096 + b'</xmp:Label>'
+    packet = xmp_packet(padding, b' xmp:CreateDate="2020-01-02">')
+    assert {} == scan_xmp(packet, [XMP_CREATEDATE], max_size=4096)
+    assert {XMP_CREATEDATE: '2020-01-02'} == scan_xmp(packet, [XMP_CREATEDATE])
+
+
+def test_scan_xmp_stops_when_found():
+    packet = (
+        xmp_packet(b' xmp:CreateDate="2020-01-02">') + b' ' * CHUNK_SIZE + b'<not xml'
+    )
+    assert {XMP_CREATEDATE: '2020-01-02'} == scan_xmp(packet, [XMP_CREATEDATE])
+
+
+def test_scan_xmp_malformed():
+    with raises(XMLSyntaxError):
+        scan_xmp(b'<x:xmpmeta><rdf:RDF></x:xmpmeta>', [XMP_CREATEDATE])
@@ -4,10 +4,31 @@ from mp.io.writer.connection_factory import ConnectionFactory
 class MockCursor:
     def __init__(self):
         self.close_count = 0
+        self.execute_count = 0
+        self.healthy = True
+        self.statements = []
+        self.copied = []
+        self.rows = []
 
     def close(self):
         self.close_count = self.close_count + 1
 
+    def execute(self, statement, params=None):
+        self.execute_count = self.execute_count + 1
+        self.statements.append(statement)
+        if not self.healthy:
+            raise Exception('connection lost')
+
+    def copy_expert(self, statement, file):
+        self.statements.append(statement)
+        self.copied.append(file.read())
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchall(self):
+        return self.rows
+
 
 class MockConnection:
     def __init__(self):
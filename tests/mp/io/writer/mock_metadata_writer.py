@@ -8,19 +8,29 @@ class MockDatabaseMetadataWriter(DatabaseMetadataWriter):
         exists_retval=True,
         insert_retval=uuid4(),
         update_retval=uuid4(),
+        upsert_retval=uuid4(),
         delete_retval=1,
+        use_upsert=True,
+        fingerprint_retval=(None, None),
         side_effects={}
     ):
         self.enter_count = 0
         self.exit_count = 0
+        self.commit_count = 0
         self.exists_count = 0
         self.exists_retval = exists_retval
+        self.exists_many_count = 0
+        self.fingerprints_count = 0
+        self.fingerprint_retval = fingerprint_retval
         self.insert_count = 0
         self.insert_retval = insert_retval
         self.update_count = 0
         self.update_retval = update_retval
+        self.upsert_count = 0
+        self.upsert_retval = upsert_retval
         self.delete_count = 0
         self.delete_retval = delete_retval
+        self.use_upsert = use_upsert
         self.side_effects = side_effects
 
     def __enter__(self):
@@ -30,12 +40,27 @@ class MockDatabaseMetadataWriter(DatabaseMetadataWriter):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.exit_count = self.exit_count + 1
 
+    def commit(self):
+        self.commit_count = self.commit_count + 1
+
     def exists(self, path):
         self.exists_count = self.exists_count + 1
         if 'exists' in self.side_effects:
             raise self.side_effects['exists']
         return self.exists_retval
 
+    def exists_many(self, paths):
+        self.exists_many_count = self.exists_many_count + 1
+        if 'exists_many' in self.side_effects:
+            raise self.side_effects['exists_many']
+        return set(paths) if self.exists_retval else set()
+
+    def fingerprints(self, paths):
+        self.fingerprints_count = self.fingerprints_count + 1
+        if 'fingerprints' in self.side_effects:
+            raise self.side_effects['fingerprints']
+        return {p: self.fingerprint_retval for p in paths} if self.exists_retval else {}
+
     def insert(self, metadata):
         self.insert_count = self.insert_count + 1
         if 'insert' in self.side_effects:
@@ -48,6 +73,12 @@ class MockDatabaseMetadataWriter(DatabaseMetadataWriter):
             raise self.side_effects['update']
         return self.update_retval
 
+    def upsert(self, metadata):
+        self.upsert_count = self.upsert_count + 1
+        if 'upsert' in self.side_effects:
+            raise self.side_effects['upsert']
+        return self.upsert_retval
+
     def delete(self, image_key):
         self.delete_count = self.delete_count + 1
         if 'delete' in self.side_effects:
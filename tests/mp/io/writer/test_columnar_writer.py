@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from io import BytesIO
+from uuid import uuid4
+
+from pytest import importorskip, raises
+
+pa = importorskip('pyarrow')
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from mp.io.writer.columnar_writer import (
+    ArrowMetadataWriter,
+    ParquetMetadataWriter,
+    arrow_schema,
+    arrow_type,
+    to_arrow_table,
+)
+from mp.io.writer.metadata_sql import _columns
+from mp.model import *
+from mp.model.batch import MetadataBatch
+from mp.model.metadata import Metadata
+from tests.mp.model.mock_metadata import mock_metadata
+
+
+def test_arrow_type():
+    assert pa.string() == arrow_type('uuid primary key')
+    assert pa.int64() == arrow_type('bigint')
+    assert pa.timestamp('us') == arrow_type('timestamp without time zone not null')
+    assert pa.timestamp('us', tz='UTC') == arrow_type('timestamp with time zone')
+    with raises(ValueError):
+        arrow_type('blob')
+
+
+def test_arrow_schema():
+    schema = arrow_schema()
+    assert _columns == schema.names
+    assert not schema.field(FILE_PATH).nullable
+    assert schema.field(ARTIST).nullable
+
+
+def test_parquet_writer():
+    expected = [
+        mock_metadata(
+            f'a/{i}.jpg',
+            {
+                IMAGE_ID: uuid4(),
+                FILE_SIZE: 1024 * i,
+                CREATE_DATE: datetime(2020, 1, 2, 3, 4, i),
+                GPS_DATE_TIME: datetime(2020, 1, 2, 8, 4, i, tzinfo=timezone.utc),
+            },
+        )
+        for i in range(5)
+    ]
+    output = BytesIO()
+    with ParquetMetadataWriter(output, row_group_size=2) as under_test:
+        for metadata in expected:
+            under_test.write(metadata)
+        under_test.commit()
+
+    parquet_file = pq.ParquetFile(BytesIO(output.getvalue()))
+    assert 3 == parquet_file.num_row_groups
+    assert 'ZSTD' == parquet_file.metadata.row_group(0).column(0).compression
+    actual = parquet_file.read().to_pylist()
+    assert [str(m.id) for m in expected] == [r[IMAGE_ID] for r in actual]
+    assert [m.create_date for m in expected] == [r[CREATE_DATE] for r in actual]
+    assert expected[4].gps_date_time == actual[4][GPS_DATE_TIME]
+    assert 4096 == actual[4][FILE_SIZE]
+    assert actual[0][ARTIST] is None
+
+
+def test_arrow_writer(tmp_path):
+    expected = [mock_metadata(f'a/{i}.jpg') for i in range(3)]
+    output = str(tmp_path / 'metadata.arrow')
+    with ArrowMetadataWriter(output, row_group_size=2) as under_test:
+        for metadata in expected:
+            under_test.write(metadata)
+
+    with pa.ipc.open_file(output) as reader:
+        assert 2 == reader.num_record_batches
+        actual = reader.read_all()
+    assert arrow_schema() == actual.schema
+    assert [m.file_path for m in expected] == actual.column(FILE_PATH).to_pylist()
+
+
+def test_parquet_writer_commit():
+    output = BytesIO()
+    with ParquetMetadataWriter(output, row_group_size=10) as under_test:
+        for i in range(3):
+            under_test.write(mock_metadata(f'a/{i}.jpg'))
+            under_test.commit()
+        assert 0 == len(under_test.batch)
+    assert 3 == pq.ParquetFile(BytesIO(output.getvalue())).num_row_groups
+
+
+def test_parquet_writer_empty():
+    output = BytesIO()
+    with ParquetMetadataWriter(output):
+        pass
+    assert 0 == pq.read_table(BytesIO(output.getvalue())).num_rows
+
+
+def test_to_arrow_table_nulls():
+    batch = MetadataBatch()
+    batch.append(mock_metadata('a/0.jpg', {ISO_SPEED: 100}))
+    batch.append(
+        Metadata(args={FILE_PATH: 'b.jpg', ISO_SPEED: None, CAMERA_MAKE: 'Google'})
+    )
+    actual = to_arrow_table(batch, arrow_schema())
+    assert [100, None] == actual.column(ISO_SPEED).to_pylist()
+    assert 1 == actual.column(ISO_SPEED).null_count
+    assert [None, 'Google'] == actual.column(CAMERA_MAKE).to_pylist()
+    assert actual.column(GPS_DATE_TIME).to_pylist()[1] is None
@@ -1,11 +1,18 @@
 from sys import platform
 from pytest import raises, mark
+import duckdb
+
 from mp.io.writer.connection_factory import (
     ConnectionFactory,
     DuckdbConnectionFactory,
     PostgresqlConnectionFactory,
+    PooledConnectionFactory,
 )
 from mp.io.writer import POSTGRESQL, DUCKDB
+from tests.mp.io.writer.mock_connection_factory import (
+    MockConnection,
+    MockConnectionFactory,
+)
 
 
 def test_instanceof_duckdb():
@@ -27,7 +34,93 @@ def test_instanceof_postgres():
     assert under_test.connect() is not None
 
 
+def test_duckdb_migrates_table(tmp_path):
+    dbname = str(tmp_path / 'test.db')
+    # a table created before the etag column was introduced
+    old = duckdb.connect(dbname)
+    old.execute('create table media_item (id varchar primary key, file_path varchar)')
+    old.close()
+
+    connection = DuckdbConnectionFactory({'dbtype': DUCKDB, 'dbname': dbname}).connect()
+    columns = [r[0] for r in connection.execute('describe media_item').fetchall()]
+    assert ['id', 'file_path', 'etag'] == columns
+
+
+@mark.parametrize(
+    'columns, expected',
+    [
+        (
+            [('id',), ('file_path',)],
+            ['alter table media_item add column if not exists etag varchar'],
+        ),
+        ([('id',), ('etag',)], []),
+        ([], []),
+    ],
+)
+def test_migrate(columns, expected):
+    connection = MockConnection()
+    connection.mock_cursor.rows = columns
+    under_test = MockConnectionFactory({'dbtype': POSTGRESQL})
+    under_test.migrate(connection)
+    assert expected == connection.mock_cursor.statements[1:]
+    assert 1 == connection.commit_count
+
+
 def test_instanceof_unknown():
     with raises(Exception):
         db = {'dbtype': 'junk', 'url': 'foobar'}
         under_test = ConnectionFactory.instance(db)
+
+
+def test_instanceof_pooled():
+    db = {'dbtype': DUCKDB, 'url': 'duckdb::memory:', 'dbname': ':memory:'}
+    under_test = ConnectionFactory.instance(db, pool_size=2)
+    assert isinstance(under_test, PooledConnectionFactory)
+    assert isinstance(under_test.factory, DuckdbConnectionFactory)
+    assert under_test is ConnectionFactory.instance(db, pool_size=2)
+
+
+def test_pooled_reuses_connection():
+    factory = MockConnectionFactory.instance({'dbtype': 'junk', 'url': 'foobar'})
+    under_test = PooledConnectionFactory(factory, size=1)
+    first = under_test.connect()
+    under_test.release(first)
+    second = under_test.connect()
+    assert first is second
+    assert factory.connect_count == 1
+    assert first.close_count == 0
+    assert first.mock_cursor.execute_count == 1
+
+
+def test_pooled_discards_unhealthy_connection():
+    factory = MockConnectionFactory.instance({'dbtype': 'junk', 'url': 'foobar'})
+    under_test = PooledConnectionFactory(factory, size=1)
+    first = under_test.connect()
+    under_test.release(first)
+    first.mock_cursor.healthy = False
+    second = under_test.connect()
+    assert first is not second
+    assert factory.connect_count == 2
+    assert first.close_count == 1
+
+
+def test_pooled_discards_idle_connection():
+    factory = MockConnectionFactory.instance({'dbtype': 'junk', 'url': 'foobar'})
+    under_test = PooledConnectionFactory(factory, size=1, idle_timeout=-1)
+    first = under_test.connect()
+    under_test.release(first)
+    second = under_test.connect()
+    assert first is not second
+    assert first.close_count == 1
+    assert first.mock_cursor.execute_count == 0
+
+
+def test_pooled_closes_connections_beyond_size():
+    factory = MockConnectionFactory.instance({'dbtype': 'junk', 'url': 'foobar'})
+    under_test = PooledConnectionFactory(factory, size=1)
+    first = under_test.connect()
+    second = under_test.connect()
+    under_test.release(first)
+    under_test.release(second)
+    assert first.close_count == 0
+    assert second.close_count == 1
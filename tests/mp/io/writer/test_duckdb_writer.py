@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+from pytest import importorskip, raises
+
+importorskip('pyarrow')
+
+from mp.io.writer import DUCKDB
+from mp.io.writer.connection_factory import DuckdbConnectionFactory
+from mp.io.writer.duckdb_writer import DuckdbMetadataWriter
+from mp.io.writer.metadata_writer import DatabaseMetadataWriter
+from mp.model import ARTIST, FILE_PATH, GPS_DATE_TIME
+from mp.model.metadata import Metadata
+from tests.mp.model.mock_metadata import mock_metadata
+
+
+def duckdb_factory():
+    return DuckdbConnectionFactory({'dbtype': DUCKDB, 'dbname': ':memory:'})
+
+
+def select_all(writer):
+    writer.cursor.execute('select file_path, artist from media_item order by file_path')
+    return writer.cursor.fetchall()
+
+
+def test_duckdb_writer_bulk():
+    with DuckdbMetadataWriter(duckdb_factory(), bulk_size=3) as under_test:
+        for i in range(4):
+            assert under_test.write(mock_metadata(f'a/{i}.jpg')) is None
+        # the first batch is written once full, the rest when committed
+        assert 3 == len(select_all(under_test))
+        under_test.commit()
+        assert 4 == len(select_all(under_test))
+
+
+def test_duckdb_writer_upsert():
+    first = mock_metadata('a/0.jpg')
+    with DuckdbMetadataWriter(duckdb_factory()) as under_test:
+        under_test.write(first)
+        under_test.commit()
+        under_test.write(mock_metadata('a/0.jpg', {ARTIST: 'updated'}))
+        under_test.write(mock_metadata('b/0.jpg'))
+        under_test.write(mock_metadata('b/0.jpg', {ARTIST: 'last'}))
+        under_test.commit()
+        assert [('a/0.jpg', 'updated'), ('b/0.jpg', 'last')] == select_all(under_test)
+        under_test.cursor.execute(
+            'select id from media_item where file_path = ?', ['a/0.jpg']
+        )
+        assert first.id == under_test.cursor.fetchone()[0]
+
+
+def test_duckdb_writer_same_as_row_by_row():
+    gps = datetime(2020, 1, 2, 8, 4, 5, tzinfo=timezone.utc)
+    metadata = Metadata(dict(mock_metadata('a/0.jpg').dict(), **{GPS_DATE_TIME: gps}))
+    rows = []
+    for writer_type in [DatabaseMetadataWriter, DuckdbMetadataWriter]:
+        with writer_type(duckdb_factory()) as writer:
+            writer.write(metadata)
+            writer.commit()
+            writer.cursor.execute('select * from media_item')
+            rows.append(writer.cursor.fetchall())
+    assert rows[0] == rows[1]
+
+
+def test_duckdb_writer_exit():
+    factory = duckdb_factory()
+    connection = factory.connect()
+    factory.connect = lambda: connection
+    factory.release = lambda c: None
+    with DuckdbMetadataWriter(factory) as under_test:
+        under_test.write(mock_metadata('a/0.jpg'))
+    assert 1 == connection.execute('select count(*) from media_item').fetchone()[0]
+
+    with raises(ValueError):
+        with DuckdbMetadataWriter(factory, bulk_size=1) as under_test:
+            under_test.write(mock_metadata('b/0.jpg'))
+            under_test.write(mock_metadata('b/1.jpg'))
+            raise ValueError('Boom!')
+    # batches written since the last commit are rolled back
+    assert 1 == connection.execute('select count(*) from media_item').fetchone()[0]
@@ -7,6 +7,8 @@ from mp.io.writer.formatter import (
     csv_formatter,
     txt_formatter,
     json_formatter,
+    ndjson_formatter,
+    csv_row,
     formatters,
 )
 
@@ -32,6 +34,7 @@ def test_json_formatter_with_conversions():
     "owner_id": null,
     "file_path": null,
     "file_size": 0,
+    "etag": null,
     "create_date": "%s",
     "create_day_id": %d,
     "mime_type": "image/jpeg",
@@ -68,6 +71,7 @@ def test_json_formatter_no_keys():
     "owner_id": null,
     "file_path": null,
     "file_size": 0,
+    "etag": null,
     "create_date": null,
     "create_day_id": 0,
     "mime_type": "image/jpeg",
@@ -100,6 +104,7 @@ def test_json_formatter_one_key():
     "owner_id": "bbb",
     "file_path": null,
     "file_size": 0,
+    "etag": null,
     "create_date": null,
     "create_day_id": 0,
     "mime_type": "image/jpeg",
@@ -132,6 +137,7 @@ def test_json_formatter_two_keys():
     "owner_id": "bbb",
     "file_path": null,
     "file_size": 0,
+    "etag": null,
     "create_date": null,
     "create_day_id": 0,
     "mime_type": "image/jpeg",
@@ -164,6 +170,7 @@ def test_json_formatter_one_key_none_val():
     "owner_id": null,
     "file_path": null,
     "file_size": 0,
+    "etag": null,
     "create_date": null,
     "create_day_id": 0,
     "mime_type": "image/jpeg",
@@ -196,6 +203,7 @@ def test_json_formatter_two_keys_empty_vals():
     "owner_id": "",
     "file_path": null,
     "file_size": 0,
+    "etag": null,
     "create_date": null,
     "create_day_id": 0,
     "mime_type": "image/jpeg",
@@ -230,8 +238,8 @@ def test_csv_formatter_none():
 
 def test_csv_formatter_no_keys():
     md = Metadata(args={})
-    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
-,,,,,0,,0,,,0,0,,0,0,,0,0,,image/jpeg,,,,0
+    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,etag,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
+,,,,,0,,,0,,,0,0,,0,0,,0,0,,image/jpeg,,,,0
 '''
     actual = csv_formatter(md.dict())
     assert expected == actual
@@ -239,8 +247,8 @@ def test_csv_formatter_no_keys():
 
 def test_csv_formatter_one_key():
     md = Metadata(args={'owner_id': 'bbb'})
-    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
-,,,,,0,,0,,,0,0,,0,0,,0,0,,image/jpeg,bbb,,,0
+    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,etag,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
+,,,,,0,,,0,,,0,0,,0,0,,0,0,,image/jpeg,bbb,,,0
 '''
     actual = csv_formatter(md.dict())
     assert expected == actual
@@ -248,8 +256,8 @@ def test_csv_formatter_one_key():
 
 def test_csv_formatter_two_keys():
     md = Metadata(args={'owner_id': 'bbb', 'artist': 'yyy'})
-    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
-,yyy,,,,0,,0,,,0,0,,0,0,,0,0,,image/jpeg,bbb,,,0
+    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,etag,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
+,yyy,,,,0,,,0,,,0,0,,0,0,,0,0,,image/jpeg,bbb,,,0
 '''
     actual = csv_formatter(md.dict())
     assert expected == actual
@@ -257,8 +265,8 @@ def test_csv_formatter_two_keys():
 
 def test_csv_formatter_one_key_none_val():
     md = Metadata(args={'owner_id': None})
-    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
-,,,,,0,,0,,,0,0,,0,0,,0,0,,image/jpeg,,,,0
+    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,etag,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
+,,,,,0,,,0,,,0,0,,0,0,,0,0,,image/jpeg,,,,0
 '''
     actual = csv_formatter(md.dict())
     assert expected == actual
@@ -266,13 +274,34 @@ def test_csv_formatter_one_key_none_val():
 
 def test_csv_formatter_two_keys_empty_vals():
     md = Metadata(args={'owner_id': '', 'artist': None})
-    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
-,,,,,0,,0,,,0,0,,0,0,,0,0,,image/jpeg,,,,0
+    expected = '''aperture,artist,camera_make,camera_model,create_date,create_day_id,etag,file_path,file_size,focal_length,focal_length_denominator,focal_length_numerator,gps_alt,gps_date_time,gps_lat,gps_lon,id,image_height,image_width,iso_speed,mime_type,owner_id,shutter_speed,shutter_speed_denominator,shutter_speed_numerator
+,,,,,0,,,0,,,0,0,,0,0,,0,0,,image/jpeg,,,,0
 '''
     actual = csv_formatter(md.dict())
     assert expected == actual
 
 
+def test_csv_row_quoting():
+    expected = 'a,,"b,c","say ""hi""","x\ny",1.5\n'
+    actual = csv_row(['a', None, 'b,c', 'say "hi"', 'x\ny', 1.5])
+    assert expected == actual
+
+
+def test_ndjson_formatter_none():
+    assert '' == ndjson_formatter(None)
+
+
+def test_ndjson_formatter_with_conversions():
+    uuid = uuid4()
+    now = datetime.now()
+    md = Metadata(args={'id': uuid, 'create_date': now})
+    actual = ndjson_formatter(md.dict())
+    assert actual.endswith('\n')
+    assert 1 == len(actual.splitlines())
+    assert actual.startswith(f'{{"id":"{uuid}","owner_id":null,')
+    assert f'"create_date":"{now.isoformat()}"' in actual
+
+
 def test_text_formatter_none():
     md = None
     expected = None
@@ -288,6 +317,7 @@ camera_make=None
 camera_model=None
 create_date=None
 create_day_id=0
+etag=None
 file_path=None
 file_size=0
 focal_length=None
@@ -319,6 +349,7 @@ camera_make=None
 camera_model=None
 create_date=None
 create_day_id=0
+etag=None
 file_path=None
 file_size=0
 focal_length=None
@@ -350,6 +381,7 @@ camera_make=None
 camera_model=None
 create_date=None
 create_day_id=0
+etag=None
 file_path=None
 file_size=0
 focal_length=None
@@ -381,6 +413,7 @@ camera_make=None
 camera_model=None
 create_date=None
 create_day_id=0
+etag=None
 file_path=None
 file_size=0
 focal_length=None
@@ -412,6 +445,7 @@ camera_make=None
 camera_model=None
 create_date=None
 create_day_id=0
+etag=None
 file_path=None
 file_size=0
 focal_length=None
@@ -10,10 +10,14 @@ from mp.io.writer.metadata_writer import (
     MetadataWriter,
     DatabaseMetadataWriter,
     FilehandleMetadataWriter,
+    CsvMetadataWriter,
 )
 from mp.io.writer import POSTGRESQL, DUCKDB
+from mp.io.writer.connection_factory import DuckdbConnectionFactory
+from mp.io.writer.metadata_sql import add_column
+from mp.model import FILE_SIZE, ETAG, ARTIST
 from tests.mp.io.writer.mock_metadata_formatter import mock_formatter
-from tests.mp.model.mock_metadata import MockMetadata
+from tests.mp.model.mock_metadata import MockMetadata, mock_metadata
 from tests.mp.io.writer.mock_metadata_writer import MockDatabaseMetadataWriter
 from tests.mp.io.writer.mock_connection_factory import MockConnectionFactory
 
@@ -45,6 +49,23 @@ def test_file_metadatawriter():
         assert mock_formatter == under_test.formatter
 
 
+def test_csv_metadatawriter_one_header():
+    output = StringIO()
+    under_test = CsvMetadataWriter(output)
+    under_test.write(MockMetadata(args={'b': 'x,y', 'a': 1}))
+    under_test.write(MockMetadata(args={'a': 2, 'b': None}))
+    under_test.commit()
+    assert 'a,b\n1,"x,y"\n2,\n' == output.getvalue()
+
+
+def test_csv_metadatawriter_no_header():
+    output = StringIO()
+    under_test = CsvMetadataWriter(output, header=False)
+    under_test.write(MockMetadata(args={'b': 'y', 'a': 1}))
+    under_test.write(MockMetadata(args={'a': 2, 'b': None}))
+    assert '1,y\n2,\n' == output.getvalue()
+
+
 def test_db_metadatawriter_init_duckdb():
     connection_factory = MockConnectionFactory.instance(
         db={'dbtype': DUCKDB, 'url': 'foobar'}
@@ -124,7 +145,9 @@ def test_db_metadatawriter_write_update():
     expected = uuid4()
     expected_path = '/foo/bar'
     metadata = {'id': expected, 'file_path': expected_path}
-    with MockDatabaseMetadataWriter(update_retval=expected) as under_test:
+    with MockDatabaseMetadataWriter(
+        update_retval=expected, use_upsert=False
+    ) as under_test:
         md = MockMetadata(args=metadata)
         actual = under_test.write(md)
     assert under_test.enter_count == 1
@@ -140,7 +163,7 @@ def test_db_metadatawriter_write_insert():
     expected = uuid4()
     metadata = {}
     with MockDatabaseMetadataWriter(
-        exists_retval=False, insert_retval=expected
+        exists_retval=False, insert_retval=expected, use_upsert=False
     ) as under_test:
         md = MockMetadata(args=metadata)
         actual = under_test.write(md)
@@ -151,3 +174,113 @@ def test_db_metadatawriter_write_insert():
     assert under_test.delete_count == 0
     assert under_test.exit_count == 1
     assert actual == expected
+
+
+def test_db_metadatawriter_write_upsert():
+    expected = uuid4()
+    metadata = {'id': expected, 'file_path': '/foo/bar'}
+    with MockDatabaseMetadataWriter(upsert_retval=expected) as under_test:
+        md = MockMetadata(args=metadata)
+        actual = under_test.write(md)
+    assert under_test.enter_count == 1
+    assert under_test.upsert_count == 1
+    assert under_test.exists_count == 0
+    assert under_test.update_count == 0
+    assert under_test.insert_count == 0
+    assert under_test.exit_count == 1
+    assert actual == expected
+
+
+def test_db_metadatawriter_upsert_duckdb():
+    connection_factory = DuckdbConnectionFactory(
+        {'dbtype': DUCKDB, 'dbname': ':memory:'}
+    )
+    first = mock_metadata('a/0.jpg')
+    second = mock_metadata('a/0.jpg', {ARTIST: 'updated'})
+    with DatabaseMetadataWriter(connection_factory) as under_test:
+        assert first.id == under_test.write(first)
+        assert first.id == under_test.write(second)
+        under_test.cursor.execute('select id, artist from media_item')
+        actual = under_test.cursor.fetchall()
+    assert [(first.id, 'updated')] == actual
+
+
+def test_db_metadatawriter_update_duckdb():
+    connection_factory = DuckdbConnectionFactory(
+        {'dbtype': DUCKDB, 'dbname': ':memory:'}
+    )
+    first = mock_metadata('a/0.jpg')
+    second = mock_metadata('a/0.jpg', {ARTIST: 'updated'})
+    with DatabaseMetadataWriter(connection_factory, use_upsert=False) as under_test:
+        assert first.id == under_test.write(first)
+        # the row of the path keeps its id, as with an upsert
+        assert first.id == under_test.write(second)
+        under_test.cursor.execute('select id, artist from media_item')
+        actual = under_test.cursor.fetchall()
+    assert [(first.id, 'updated')] == actual
+
+
+def test_db_metadatawriter_write_many_duckdb():
+    connection_factory = DuckdbConnectionFactory(
+        {'dbtype': DUCKDB, 'dbname': ':memory:'}
+    )
+    first = [mock_metadata(f'a/{i}.jpg') for i in range(5)]
+    with DatabaseMetadataWriter(connection_factory) as under_test:
+        connection = under_test.connection
+        actual = under_test.write_many(first, batch_size=2)
+        assert [m.id for m in first] == actual
+
+        # existing paths keep their id and are updated; duplicates collapse
+        second = [
+            mock_metadata('a/0.jpg', {ARTIST: 'updated'}),
+            mock_metadata('b/0.jpg'),
+            mock_metadata('b/0.jpg', {ARTIST: 'last'}),
+        ]
+        actual = under_test.write_many(second)
+        assert [first[0].id, second[2].id, second[2].id] == actual
+
+        under_test.cursor.execute('select file_path, artist from media_item')
+        rows = dict(under_test.cursor.fetchall())
+    assert 6 == len(rows)
+    assert 'updated' == rows['a/0.jpg']
+    assert 'last' == rows['b/0.jpg']
+
+
+def test_db_metadatawriter_exists_many_duckdb():
+    connection_factory = DuckdbConnectionFactory(
+        {'dbtype': DUCKDB, 'dbname': ':memory:'}
+    )
+    with DatabaseMetadataWriter(connection_factory) as under_test:
+        under_test.write_many([mock_metadata(f'a/{i}.jpg') for i in range(3)])
+        actual = under_test.exists_many(['a/0.jpg', 'a/2.jpg', 'b/0.jpg'])
+        assert {'a/0.jpg', 'a/2.jpg'} == actual
+        assert set() == under_test.exists_many([])
+
+
+def test_db_metadatawriter_fingerprints_duckdb():
+    connection_factory = DuckdbConnectionFactory(
+        {'dbtype': DUCKDB, 'dbname': ':memory:'}
+    )
+    with DatabaseMetadataWriter(connection_factory) as under_test:
+        under_test.write_many(
+            [
+                mock_metadata('a/0.jpg', {ETAG: '"abc"', FILE_SIZE: 1024}),
+                mock_metadata('a/1.jpg'),
+            ]
+        )
+        actual = under_test.fingerprints(['a/0.jpg', 'a/1.jpg', 'b/0.jpg'])
+        assert {'a/0.jpg': ('"abc"', 1024), 'a/1.jpg': (None, 0)} == actual
+
+
+def test_add_column_duckdb():
+    connection_factory = DuckdbConnectionFactory(
+        {'dbtype': DUCKDB, 'dbname': ':memory:'}
+    )
+    connection = connection_factory.connect()
+    # a table created before the column was introduced
+    connection.execute('drop table media_item')
+    connection.execute('create table media_item (id varchar primary key)')
+    connection.execute(add_column(ETAG))
+    connection.execute(add_column(ETAG))  # already added
+    columns = [r[0] for r in connection.execute('describe media_item').fetchall()]
+    assert ['id', 'etag'] == columns
@@ -0,0 +1,82 @@
+from csv import reader
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from pytest import raises
+
+from mp.io.writer import DUCKDB, POSTGRESQL
+from mp.io.writer.metadata_sql import _columns
+from mp.io.writer.postgresql_writer import PostgresqlCopyMetadataWriter, to_csv
+from mp.model import ARTIST
+from tests.mp.io.writer.mock_connection_factory import MockConnectionFactory
+from tests.mp.model.mock_metadata import mock_metadata
+
+
+def copy_writer(bulk_size=10):
+    factory = MockConnectionFactory({'dbtype': POSTGRESQL})
+    return PostgresqlCopyMetadataWriter(factory, bulk_size=bulk_size)
+
+
+def test_copy_writer_flush():
+    with copy_writer() as under_test:
+        cursor = under_test.cursor
+        assert under_test.write(mock_metadata('a/0.jpg')) is None
+        under_test.write(mock_metadata('a/1.jpg'))
+        under_test.write(mock_metadata('a/1.jpg', {ARTIST: 'last'}))
+        assert [] == cursor.statements
+        under_test.commit()
+        connection = under_test.connection
+
+    create, copy, merge, truncate = cursor.statements
+    assert create.startswith('create temporary table if not exists media_item_staging')
+    assert copy.startswith('copy media_item_staging (aperture, artist,')
+    assert copy.endswith('from stdin with (format csv)')
+    assert merge.startswith('insert into media_item (aperture, artist,')
+    assert 'select aperture, artist,' in merge
+    assert 'from media_item_staging on conflict (file_path) do update set' in merge
+    assert 'truncate media_item_staging' == truncate
+
+    rows = list(reader(cursor.copied[0].splitlines()))
+    assert ['a/0.jpg', 'a/1.jpg'] == [r[_columns.index('file_path')] for r in rows]
+    assert 'last' == rows[1][_columns.index('artist')]
+    assert 2 == connection.commit_count
+
+
+def test_copy_writer_bulk_size():
+    with copy_writer(bulk_size=2) as under_test:
+        for i in range(5):
+            under_test.write(mock_metadata(f'a/{i}.jpg'))
+        assert 2 == len(under_test.cursor.copied)
+    # the remainder is written on exit
+    assert 3 == len(under_test.cursor.copied)
+    assert 1 == under_test.connection.commit_count
+
+
+def test_copy_writer_exception():
+    with raises(ValueError):
+        with copy_writer() as under_test:
+            under_test.write(mock_metadata('a/0.jpg'))
+            raise ValueError('Boom!')
+    assert [] == under_test.cursor.copied
+    assert 1 == under_test.connection.rollback_count
+    assert 0 == under_test.connection.commit_count
+
+
+def test_copy_writer_duckdb():
+    with raises(ValueError):
+        PostgresqlCopyMetadataWriter(MockConnectionFactory({'dbtype': DUCKDB}))
+
+
+def test_to_csv():
+    uuid = uuid4()
+    row = [
+        uuid,
+        '',
+        None,
+        3,
+        1.5,
+        datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        'a,"b"',
+    ]
+    expected = f'"{uuid}","",,"3","1.5","2020-01-02 03:04:05+00:00","a,""b"""\n'
+    assert expected == to_csv([row]).read()
@@ -1,3 +1,7 @@
+from datetime import datetime
+from uuid import uuid4
+
+from mp.model import IMAGE_ID, OWNER_ID, FILE_PATH, FILE_SIZE, CREATE_DATE
 from mp.model.metadata import Metadata
 
 
@@ -8,3 +12,20 @@ class MockMetadata(Metadata):
 
     def dict(self):
         return self.mock_args
+
+
+def mock_metadata(path, args={}):
+    '''
+    Metadata of the image at `path`, with new ids and the fields a row of
+    the metadata table requires, updated with `args`.
+    '''
+    return Metadata(
+        args={
+            IMAGE_ID: str(uuid4()),
+            OWNER_ID: str(uuid4()),
+            FILE_PATH: path,
+            FILE_SIZE: 0,
+            CREATE_DATE: datetime(2020, 1, 2, 3, 4, 5),
+            **args,
+        }
+    )
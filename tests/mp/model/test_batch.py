@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from mp.model import *
+from mp.model.batch import (
+    DictionaryColumn,
+    MetadataBatch,
+    NumericColumn,
+    ObjectColumn,
+    TimestampColumn,
+)
+from mp.model.metadata import COLUMNS
+from tests.mp.model.mock_metadata import mock_metadata
+
+
+def test_batch_rows():
+    expected = [
+        mock_metadata(
+            'a/0.jpg',
+            {CAMERA_MAKE: 'Google', CREATE_DATE: datetime(2020, 1, 2, 3, 4, 5)},
+        ),
+        mock_metadata(
+            'a/1.jpg', {CAMERA_MAKE: 'Google', ISO_SPEED: 100, GPS_LAT: 40.5}
+        ),
+    ]
+    under_test = MetadataBatch()
+    for metadata in expected:
+        under_test.append(metadata)
+
+    assert 2 == len(under_test)
+    actual = list(under_test.rows())
+    for md, row in zip(expected, actual):
+        expected_row = md.to_row()
+        expected_row[COLUMNS.index(IMAGE_ID)] = str(md.id)
+        assert expected_row == row
+
+
+def test_batch_replaces_path():
+    under_test = MetadataBatch()
+    under_test.append(mock_metadata('a/0.jpg', {ARTIST: 'first', ISO_SPEED: 100}))
+    under_test.append(mock_metadata('a/1.jpg'))
+    under_test.append(mock_metadata('a/0.jpg', {ARTIST: 'last'}))
+
+    assert 2 == len(under_test)
+    row = next(under_test.rows())
+    assert 'last' == row[COLUMNS.index(ARTIST)]
+    assert row[COLUMNS.index(ISO_SPEED)] is None
+    assert 2 == under_test.columns[ISO_SPEED].nulls
+
+
+def test_batch_clear():
+    under_test = MetadataBatch()
+    under_test.append(mock_metadata('a/0.jpg'))
+    under_test.clear()
+    assert 0 == len(under_test)
+    assert [] == list(under_test.rows())
+
+
+def test_batch_column_types():
+    columns = MetadataBatch().columns
+    assert 'q' == columns[FILE_SIZE].data.typecode
+    assert 'i' == columns[IMAGE_WIDTH].data.typecode
+    assert 'd' == columns[GPS_LAT].data.typecode
+    assert isinstance(columns[CREATE_DATE], TimestampColumn)
+    assert isinstance(columns[CAMERA_MAKE], DictionaryColumn)
+    assert isinstance(columns[FILE_PATH], ObjectColumn)
+
+
+def test_numeric_column_nulls():
+    under_test = NumericColumn('i')
+    under_test.append(1)
+    under_test.append(None)
+    assert 1 == under_test.nulls
+    under_test.set(1, 2)
+    under_test.set(0, None)
+    assert 1 == under_test.nulls
+    assert [None, 2] == [under_test.get(0), under_test.get(1)]
+    assert bytearray([0, 1]) == under_test.valid
+
+
+def test_timestamp_column():
+    naive = datetime(2020, 1, 2, 3, 4, 5, 6)
+    under_test = TimestampColumn()
+    under_test.append(naive)
+    assert naive == under_test.get(0)
+
+    aware = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2)))
+    under_test = TimestampColumn(with_tz=True)
+    under_test.append(aware)
+    assert aware == under_test.get(0)
+    assert timezone.utc == under_test.get(0).tzinfo
+
+
+def test_dictionary_column():
+    under_test = DictionaryColumn()
+    for value in ['Google', None, 'Apple', 'Google']:
+        under_test.append(value)
+    assert [None, 'Google', 'Apple'] == under_test.values
+    assert [1, 0, 2, 1] == list(under_test.codes)
+    assert 'Apple' == under_test.get(2)
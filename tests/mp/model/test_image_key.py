@@ -33,6 +33,10 @@ def test_new_image_key():
     assert ik.file_path == under_test
 
 
+def test_new_image_key_default():
+    assert ImageKey.new() != ImageKey.new()
+
+
 def test_parse_image_key():
     expected = uid, iid, ext
     actual = parse(under_test)
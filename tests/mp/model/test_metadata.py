@@ -1,8 +1,8 @@
 from assertpy import assert_that
 from datetime import datetime
 
-from mp.model import MIME_TYPE
-from mp.model.metadata import Metadata, create_day_id
+from mp.model import APERTURE, ARTIST, CREATE_DATE, CREATE_DAY_ID, MIME_TYPE
+from mp.model.metadata import COLUMNS, FIELDS, Metadata, create_day_id
 
 
 def test_create_day_id_none():
@@ -59,3 +59,33 @@ def test_not_equal_different_types():
     actual = Metadata(args={})
     result = actual.__eq__('foobar')
     assert result == NotImplemented
+
+
+def test_create_day_id_from_create_date():
+    actual = Metadata(
+        args={CREATE_DATE: datetime(2020, 1, 2, 3, 4, 5), CREATE_DAY_ID: 1}
+    )
+    assert 20200102 == actual.create_day_id
+
+
+def test_create_day_id_without_create_date():
+    assert 0 == Metadata(args={}).create_day_id
+    assert 20200102 == Metadata(args={CREATE_DAY_ID: 20200102}).create_day_id
+
+
+def test_dict():
+    actual = Metadata(args={ARTIST: 'foobar'}).dict()
+    assert list(FIELDS) == list(actual.keys())
+    assert 'foobar' == actual[ARTIST]
+    assert 'image/jpeg' == actual[MIME_TYPE]
+
+
+def test_to_row():
+    md = Metadata(args={ARTIST: 'foobar', CREATE_DATE: datetime(2020, 1, 2)})
+    expected = [md.dict()[c] for c in COLUMNS]
+    assert expected == md.to_row()
+
+
+def test_columns():
+    assert sorted(FIELDS) == sorted(COLUMNS)
+    assert COLUMNS.index(APERTURE) == 0
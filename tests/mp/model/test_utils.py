@@ -0,0 +1,72 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+from pytest import mark
+
+from mp.model.utils import date_patterns, parse_date, pattern_regex
+
+
+def parse_date_by_trial(d, tz=None):
+    for dp in date_patterns:
+        try:
+            return datetime.strptime(d, dp).replace(tzinfo=tz)
+        except ValueError:
+            pass
+
+
+@mark.parametrize(
+    'date',
+    [
+        '2019: 02: 24 20: 51: 15',
+        '2019:02:24 20:51:15',
+        '2019:2:4 1:5:6',
+        '2019:02:24 20:51',
+        '2019-02-24 20:51:15',
+        '2019-02-24  20:51',
+        '2019.02.24 20:51:15',
+        '2019.02.24 20:51',
+        '2019-02-24T20:51:15+01:00',
+        '2019-02-24T20:51:15Z',
+        '2019-02-24t20:51:15+0100',
+        '2019-02-24T20:51:15',
+        '2019-02-24T20:51-05:00',
+        '2019-02-24T20:51',
+        '2019-02-24',
+        '2019-02',
+        '20190224',
+        '201902',
+        '2019',
+        '2019:13:24 20:51:15',
+        '2019:02:30 20:51:15',
+        '0000:00:00 00:00:00',
+        '2019-02-24T20:51:15.123',
+        '2019/02/24',
+        'abc',
+    ],
+)
+def test_parse_date_as_by_trial(date):
+    assert parse_date_by_trial(date) == parse_date(date)
+    assert parse_date_by_trial(date, timezone.utc) == parse_date(date, timezone.utc)
+
+
+def test_parse_date_none():
+    assert parse_date(None) is None
+    assert parse_date('') is None
+
+
+def test_parse_date_tz():
+    actual = parse_date('2019-02-24T20:51:15+01:00')
+    assert datetime(2019, 2, 24, 20, 51, 15) == actual
+    assert actual.tzinfo is None
+    actual = parse_date('2019-02-24T20:51:15+01:00', tz=timezone.utc)
+    assert timezone.utc == actual.tzinfo
+    # tz of a cached date is not kept
+    assert parse_date('2019-02-24T20:51:15+01:00').tzinfo is None
+
+
+def test_pattern_regex():
+    regex = re.compile(pattern_regex('%Y: %m-%dT%H'))
+    assert regex.fullmatch('2019:  2- 4T20')
+    assert regex.fullmatch('2019: 02-04T20')
+    assert not regex.fullmatch('2019:02-04T20')
+    assert not regex.fullmatch('2019: 02.04T20')
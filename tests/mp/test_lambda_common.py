@@ -1,15 +1,22 @@
 from copy import deepcopy
+from os import environ
 from sys import exc_info
 
 from unittest.mock import patch
 from pytest import raises
 
+from mp import DATABASE_POOL_SIZE, WORKER_COUNT
 from mp.model.image_key import ImageKey
+from mp.io.loader.s3_loader import ObjectInfo
 from mp.lambda_common import (
     extract_image_keys_from_s3_event,
     extract_image_key_from_apig_event,
     check_force_update,
+    check_hard_update,
+    is_unchanged,
+    pool_size,
     write_exception_event,
+    DEFAULT_POOL_SIZE,
 )
 
 from tests.mp import (
@@ -46,6 +53,59 @@ def test_check_force_update_none():
     assert check_force_update(None) is None
 
 
+def test_check_hard_update():
+    mock_event = deepcopy(apig_event_sample)
+
+    mock_event['queryStringParameters'] = {'update': 'hard'}
+    assert check_hard_update(mock_event) == True
+
+    mock_event['queryStringParameters'] = 'update=hard'
+    assert check_hard_update(mock_event) == True
+
+    mock_event['queryStringParameters'] = {'update': 'true'}
+    assert check_hard_update(mock_event) == False
+
+    mock_event['queryStringParameters'] = 'update'
+    assert check_hard_update(mock_event) == False
+
+    mock_event['queryStringParameters'] = 'foo=bar&update=hard'
+    assert check_hard_update(mock_event) == True
+
+    mock_event['queryStringParameters'] = 'update=hardly'
+    assert check_hard_update(mock_event) == False
+
+    mock_event['queryStringParameters'] = 'xupdate=hard'
+    assert check_hard_update(mock_event) == False
+
+
+def test_check_hard_update_none():
+    assert check_hard_update(None) is None
+
+
+def test_is_unchanged():
+    object_info = ObjectInfo('key', 1024, '"abc"', None, 'image/jpeg')
+    assert is_unchanged(('"abc"', 1024), object_info)
+    assert not is_unchanged(('"abd"', 1024), object_info)
+    assert not is_unchanged(('"abc"', 1023), object_info)
+    assert not is_unchanged((None, 1024), ObjectInfo('key', 1024, None, None, None))
+    assert not is_unchanged(None, object_info)
+    assert not is_unchanged(('"abc"', 1024), None)
+
+
+def test_pool_size():
+    with patch.dict(environ, clear=True):
+        assert DEFAULT_POOL_SIZE == pool_size()
+    with patch.dict(environ, {DATABASE_POOL_SIZE: '2'}, clear=True):
+        assert 2 == pool_size()
+    # at least one connection per worker
+    with patch.dict(environ, {WORKER_COUNT: '8'}, clear=True):
+        assert 8 == pool_size()
+    with patch.dict(environ, {DATABASE_POOL_SIZE: '2', WORKER_COUNT: '3'}, clear=True):
+        assert 3 == pool_size()
+    with patch.dict(environ, {DATABASE_POOL_SIZE: '10', WORKER_COUNT: '3'}, clear=True):
+        assert 10 == pool_size()
+
+
 def test_extract_image_key_from_apig_event():
     expected_key = mock_event_keys[0]
     actual_key = extract_image_key_from_apig_event(apig_event_sample)
@@ -8,7 +8,7 @@ from pytest import raises
 
 from mp.model.image_key import ImageKey
 from mp import lambda_handler
-from mp import lambda_common, SOURCE_BUCKET, TRIGGER_ERROR
+from mp import lambda_common, SOURCE_BUCKET, TRIGGER_ERROR, WORKER_COUNT
 from mp.io.loader import s3_loader
 from mp.util import tools
 
@@ -20,6 +20,9 @@ from tests.mp import (
 )
 from tests.mp.io.writer.mock_metadata_writer import MockDatabaseMetadataWriter
 
+MOCK_ETAG = '"d41d8cd98f00b204e9800998ecf8427e"'
+
+
 def test_get_event_type_s3():
     expected = 's3'
     actual = lambda_handler.get_event_type(s3_put_single_event_sample)
@@ -114,6 +117,35 @@ def test_api_handler_single_skip_update(mocker):
     )
 
 
+def test_api_handler_single_force_update_unchanged(mocker):
+    force_update = True
+    exists_in_s3 = True
+    exists_in_db = True
+    _api_handler(
+        mocker,
+        force_update,
+        exists_in_s3,
+        exists_in_db,
+        event_write_cnt=0,
+        sc=204,
+        fingerprint=(MOCK_ETAG, 1024),
+    )
+
+
+def test_api_handler_single_hard_update_unchanged(mocker):
+    force_update = True
+    exists_in_s3 = True
+    exists_in_db = True
+    _api_handler(
+        mocker,
+        force_update,
+        exists_in_s3,
+        exists_in_db,
+        fingerprint=(MOCK_ETAG, 1024),
+        hard_update=True,
+    )
+
+
 def test_api_handler_single_image_not_found(mocker):
     force_update = False
     exists_in_s3 = False
@@ -197,6 +229,92 @@ def test_s3_handler_multiple_skip_update(mocker):
     )
 
 
+def test_s3_handler_multiple_force_update_unchanged(mocker):
+    force_update = True
+    exists_in_s3 = True
+    exists_in_db = True
+    _s3_handler_multi(
+        mocker,
+        force_update,
+        exists_in_s3,
+        exists_in_db,
+        event_write_cnt=0,
+        fingerprint=(MOCK_ETAG, 1024),
+    )
+
+
+def test_s3_handler_multiple_force_update_changed(mocker):
+    force_update = True
+    exists_in_s3 = True
+    exists_in_db = True
+    _s3_handler_multi(
+        mocker, force_update, exists_in_s3, exists_in_db, fingerprint=('"other"', 1024)
+    )
+
+
+def test_s3_handler_multiple_hard_update_unchanged(mocker):
+    force_update = True
+    exists_in_s3 = True
+    exists_in_db = True
+    _s3_handler_multi(
+        mocker,
+        force_update,
+        exists_in_s3,
+        exists_in_db,
+        fingerprint=(MOCK_ETAG, 1024),
+        hard_update=True,
+    )
+
+
+def test_s3_handler_multiple_concurrent(mocker):
+    writers = []
+
+    def new_writer():
+        writers.append(MockDatabaseMetadataWriter(exists_retval=False))
+        return writers[-1]
+
+    failing_key = ImageKey(mock_event_keys[1])
+
+    def write_metadata(writer, key, object_info):
+        if key == failing_key:
+            raise ValueError('Boom!')
+        return key.image_id
+
+    mocker.patch.dict(os.environ, {WORKER_COUNT: '3'})
+    mocker.patch.object(
+        lambda_common, 'init_metadata_writer', MagicMock(side_effect=new_writer)
+    )
+    mocker.patch.object(
+        s3_loader, 'key_exists', MagicMock(return_value=mock_object_info())
+    )
+    mocker.patch.object(
+        lambda_common, 'write_metadata', MagicMock(side_effect=write_metadata)
+    )
+    mocker.patch.object(lambda_common, 'init_exception_writer')
+    mocker.patch.object(lambda_common, 'write_exception_event')
+    mock_scope = MagicMock()
+    record_scopes = mock_push_scope(mocker)
+
+    lambda_handler.s3_handler(deepcopy(s3_put_multiple_event_sample), mock_scope)
+
+    event_cnt = len(mock_event_keys)
+    assert lambda_common.write_metadata.call_count == event_cnt
+    assert s3_loader.key_exists.call_count == event_cnt
+    # each record is tagged in its own scope, not the shared one of the handler
+    assert mock_scope.set_tag.call_count == 0
+    assert len(record_scopes) == event_cnt
+    assert all(scope.set_tag.call_count == 3 for scope in record_scopes)
+    assert lambda_common.write_exception_event.call_count == 1
+    assert lambda_common.write_exception_event.call_args[0][1] == failing_key
+    # one writer for the bulk existence check, and at most one per worker
+    assert 2 <= len(writers) <= 4
+    assert sum([w.enter_count for w in writers[1:]]) == event_cnt
+
+
+def mock_object_info():
+    return s3_loader.ObjectInfo(None, 1024, MOCK_ETAG, None, 'image/jpeg')
+
+
 def _api_handler(
     mocker,
     force_update,
@@ -206,6 +324,7 @@ def _api_handler(
     event=None,
     event_write_cnt=None,
     mock_env={},
+    **kwargs,
 ):
     if event is not None:
         mock_event = event
@@ -221,6 +340,7 @@ def _api_handler(
         mock_event,
         event_write_cnt=event_write_cnt,
         mock_env=mock_env,
+        **kwargs,
     )
 
     assert actual_response['statusCode'] == sc
@@ -229,7 +349,13 @@ def _api_handler(
 
 
 def _s3_handler_multi(
-    mocker, force_update, exists_in_s3, exists_in_db, event_write_cnt=None, mock_env={}
+    mocker,
+    force_update,
+    exists_in_s3,
+    exists_in_db,
+    event_write_cnt=None,
+    mock_env={},
+    **kwargs,
 ):
     mock_events = deepcopy(s3_put_multiple_event_sample)
     event_cnt = len(mock_event_keys)
@@ -243,6 +369,7 @@ def _s3_handler_multi(
         event_cnt,
         event_write_cnt=event_write_cnt,
         mock_env=mock_env,
+        **kwargs,
     )
 
 
@@ -274,14 +401,19 @@ def _handler_run(
     event_write_cnt=None,
     mock_env={},
     mock_exception=None,
+    fingerprint=(None, None),
+    hard_update=False,
 ):
     if event_write_cnt is None:
         event_write_cnt = event_cnt
 
-    mock_writer = MockDatabaseMetadataWriter(exists_retval=exists_in_db)
+    mock_writer = MockDatabaseMetadataWriter(
+        exists_retval=exists_in_db, fingerprint_retval=fingerprint
+    )
     mocker.patch.object(lambda_common, 'init_metadata_writer', MagicMock(return_value=mock_writer))
 
-    mocker.patch.object(s3_loader, 'key_exists', MagicMock(return_value=exists_in_s3))
+    object_info = mock_object_info() if exists_in_s3 else None
+    mocker.patch.object(s3_loader, 'key_exists', MagicMock(return_value=object_info))
 
     if mock_exception:
         mock_write_metadata = MagicMock(side_effect=mock_exception)
@@ -293,17 +425,33 @@ def _handler_run(
     mocker.patch.object(lambda_common, 'write_metadata', mock_write_metadata)
 
     mock_scope = MagicMock()
+    record_scopes = mock_push_scope(mocker)
 
     if mock_env:
         mocker.patch.dict(os.environ, mock_env, clear=True)
 
-    response = handler(mock_event, mock_scope, force_update=force_update)
+    response = handler(
+        mock_event, mock_scope, force_update=force_update, hard_update=hard_update
+    )
 
-    assert mock_scope.set_tag.call_count == 3 * event_cnt
-    assert s3_loader.key_exists.call_count == event_cnt
+    checked_cnt = event_cnt
+    if handler == lambda_handler.s3_handler:
+        # keys already in the db are filtered out before being looked at
+        assert mock_writer.fingerprints_count == 1
+        assert mock_writer.exists_count == 0
+        if exists_in_db and not force_update:
+            checked_cnt = 0
+        tagged = sum(scope.set_tag.call_count for scope in record_scopes)
+        assert len(record_scopes) == checked_cnt
+    else:
+        tagged = mock_scope.set_tag.call_count
+
+    assert tagged == 3 * checked_cnt
+    assert s3_loader.key_exists.call_count == checked_cnt
     if exists_in_s3:
         assert lambda_common.init_metadata_writer.call_count == 1
-        assert mock_writer.exists_count == event_cnt
+        if handler == lambda_handler.api_handler:
+            assert mock_writer.fingerprints_count == event_cnt
         assert lambda_common.write_metadata.call_count == event_write_cnt
 
     if mock_exception:
@@ -313,6 +461,20 @@ def _handler_run(
     return response
 
 
+def mock_push_scope(mocker):
+    '''Patches `sentry_sdk.push_scope`, returning the list of scopes it pushes.'''
+    scopes = []
+
+    def push_scope():
+        scopes.append(MagicMock())
+        pushed = MagicMock()
+        pushed.__enter__.return_value = scopes[-1]
+        return pushed
+
+    mocker.patch.object(sentry_sdk, 'push_scope', MagicMock(side_effect=push_scope))
+    return scopes
+
+
 def setup_handler(mocker, force_update_retval, event_type, mock_env={}):
     mocker.patch.object(tools, 'configure_logging')
     mocker.patch.object(logging, 'info')
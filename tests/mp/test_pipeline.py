@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+from mp import pipeline
+from mp.model.image_key import ImageKey
+from tests.mp.model.mock_metadata import MockMetadata
+from tests.mp.io.writer.mock_metadata_writer import MockDatabaseMetadataWriter
+
+
+def test_discover_single():
+    image_key = ImageKey.new()
+    actual = list(pipeline.discover(('a.jpg',), image_key))
+    assert [(image_key, 'a.jpg')] == actual
+
+
+def test_discover_single_no_key():
+    [(actual, _)] = list(pipeline.discover(['a.jpg']))
+    assert isinstance(actual, ImageKey)
+
+
+def test_discover_multiple():
+    image_key = ImageKey.new()
+    actual = list(pipeline.discover(['a.jpg', 'b.jpg', 'c.jpg'], image_key))
+    assert ['a.jpg', 'b.jpg', 'c.jpg'] == [f for _, f in actual]
+    keys = [k for k, _ in actual]
+    assert image_key not in keys
+    assert 3 == len(set([k.file_path for k in keys]))
+
+
+def test_discover_extension():
+    actual = list(pipeline.discover(['a.PNG', 'b.jpeg', 'c']))
+    assert ['png', 'jpeg', 'jpg'] == [k.extension for k, _ in actual]
+
+
+def test_discover_empty():
+    assert [] == list(pipeline.discover([], ImageKey.new()))
+
+
+def test_discover_lazy():
+    consumed = []
+
+    def filenames():
+        for f in ['a.jpg', 'b.jpg', 'c.jpg', 'd.jpg']:
+            consumed.append(f)
+            yield f
+
+    images = pipeline.discover(filenames())
+    next(images)
+    assert ['a.jpg', 'b.jpg'] == consumed
+
+
+def test_write():
+    writer = MockDatabaseMetadataWriter()
+    consumed = []
+
+    def metadatas():
+        for path in ['a.jpg', 'b.jpg']:
+            consumed.append(path)
+            yield MockMetadata({'file_path': path})
+
+    results = pipeline.write(writer, metadatas())
+    assert writer.upsert_retval == next(results)
+    assert ['a.jpg'] == consumed
+    assert 1 == writer.upsert_count
+    assert [writer.upsert_retval] == list(results)
+    assert 1 == writer.enter_count
+    assert 1 == writer.exit_count
+
+
+def test_write_commit_rows():
+    writer = MockDatabaseMetadataWriter()
+    metadatas = [MockMetadata({'file_path': f'{i}.jpg'}) for i in range(5)]
+    list(pipeline.write(writer, metadatas, commit_rows=2))
+    assert 5 == writer.upsert_count
+    assert 2 == writer.commit_count
+    assert 1 == writer.enter_count
+    assert 1 == writer.exit_count
+
+
+def test_write_commit_seconds(mocker):
+    writer = MockDatabaseMetadataWriter()
+    mocker.patch.object(pipeline, 'monotonic', MagicMock(side_effect=[0, 1, 6, 6, 7]))
+    metadatas = [MockMetadata({'file_path': f'{i}.jpg'}) for i in range(3)]
+    list(pipeline.write(writer, metadatas, commit_seconds=5))
+    assert 3 == writer.upsert_count
+    assert 1 == writer.commit_count
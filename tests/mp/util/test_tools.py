@@ -1,7 +1,7 @@
 import pytest
 from assertpy import assert_that, fail
 
-from mp.util.tools import DatabaseUrlType
+from mp.util.tools import DatabaseUrlType, batches
 
 duckdb_testdata = [
     ('duckdb:foo/bar', 'foo/bar'),
@@ -92,3 +92,8 @@ def test_failure_cases(input, expected):
         fail('Should have thrown exception')
     except Exception as e:
         assert_that(str(e)).contains(expected)
+
+
+def test_batches():
+    assert [[0, 1], [2, 3], [4]] == list(batches(range(5), 2))
+    assert [] == list(batches([], 2))